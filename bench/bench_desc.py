@@ -0,0 +1,92 @@
+# ================================================
+# bench/bench_desc.py - Açıklama HTML → metin mikro-benchmark'ı
+# ================================================
+# Eski yol (entry başına 1-3 BeautifulSoup) ile yeni tek geçişli tarayıcıyı
+# aynı fixture'lar üzerinde karşılaştırır; çıktıların birebir aynı olduğunu
+# da doğrular.
+#
+#   python -m bench.bench_desc [--repeat 5]
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feedparser  # noqa: E402
+from bs4 import BeautifulSoup  # noqa: E402
+
+import server  # noqa: E402
+from bench.fixtures import DESC_EDGE_CASES, load_feed_fixtures  # noqa: E402
+
+
+def old_desc_and_image(entry):
+    """Değişiklik öncesi davranış: get_text() için bir soup, <img> için bir-iki soup daha."""
+    raw = entry.get("description") or entry.get("summary", "")
+    text = BeautifulSoup(raw, "html.parser").get_text() if raw else ""
+    img = server._image_from_entry_media(entry)
+    if not img and hasattr(entry, "summary") and entry.summary:
+        tag = BeautifulSoup(entry.summary, "html.parser").find("img")
+        if tag and tag.get("src"):
+            img = tag["src"]
+    if not img and hasattr(entry, "content") and entry.content:
+        for c in entry.content:
+            if "value" in c:
+                tag = BeautifulSoup(c["value"], "html.parser").find("img")
+                if tag and tag.get("src"):
+                    img = tag["src"]
+                    break
+    return text.strip(), img
+
+
+def new_desc_and_image(entry):
+    raw = entry.get("description") or entry.get("summary", "")
+    text, desc_img = server.html_to_text_and_image(raw)
+    img = server._image_from_entry_media(entry) or desc_img or server._image_from_entry_content(entry)
+    return text.strip(), img
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    fixtures = load_feed_fixtures(server.RSS_CATEGORIES)
+    entries = []
+    for raw in fixtures.values():
+        entries.extend(feedparser.parse(raw).entries)
+    print(f"{len(fixtures)} feed, {len(entries)} kayıt")
+
+    mismatches = 0
+    for html in DESC_EDGE_CASES:
+        old = BeautifulSoup(html, "html.parser").get_text()
+        new = server.html_to_text_and_image(html)[0]
+        if old != new:
+            mismatches += 1
+            print("  ⚠️ fark:", repr(html), repr(old), repr(new))
+    for e in entries:
+        if old_desc_and_image(e) != new_desc_and_image(e):
+            mismatches += 1
+            if mismatches <= 5:
+                print("  ⚠️ fark:", e.get("link"), old_desc_and_image(e), new_desc_and_image(e))
+
+    results = {}
+    for name, fn in (("beautifulsoup", old_desc_and_image), ("scanner", new_desc_and_image)):
+        best = None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            for e in entries:
+                fn(e)
+            dt = time.perf_counter() - t0
+            best = dt if best is None else min(best, dt)
+        results[name] = best
+        print(f"{name:>14}: {best * 1000:8.1f} ms  ({best / max(len(entries), 1) * 1e6:6.1f} µs/kayıt)")
+
+    print(f"hızlanma: x{results['beautifulsoup'] / results['scanner']:.1f}, farklı çıktı: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+# ================================================
+# bench/fixtures.py - Benchmark fixture'ları
+# ================================================
+# Öncelik: bench/fixtures/feeds/ altına kaydedilmiş gerçek RSS dosyaları.
+# Kayıt yoksa (CI, ağsız ortam) yayıncıların RSS yapısını taklit eden
+# deterministik sentetik feed'ler üretilir; böylece benchmark her yerde koşar.
+
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FEED_DIR = os.path.join(FIXTURE_DIR, "feeds")
+
+_WORDS = (
+    "Türkiye ekonomi büyüme İstanbul Ankara maç gol transfer seçim meclis "
+    "açıklama bakan dolar enflasyon faiz deprem yağış sağlık hastane öğrenci "
+    "sınav teknoloji yapay zekâ konser sergi festival şampiyon lig derbi"
+).split()
+
+# Yayıncı bazında açıklama / görsel biçimi
+_STYLES = {
+    "milliyet": "cdata_img",
+    "hurriyet": "enclosure",
+    "ntv": "atom_content",
+    "mynet": "entity_img",
+    "sabah": "media_content",
+    "trthaber": "plain",
+}
+
+
+# Etiketler arası boşluk: bitişik, girintili (CMS şablonu), CRLF, boşluk dizisi.
+# bs4 yalnızca boşluktan oluşan metni tek " " / "\n"e indirir; tarayıcı da aynısını yapmalı.
+_GAPS = ("", "", "\n    ", "   ", "\r\n", "\r\n\t\t", " \n ", "&#13;\n")
+
+
+def _sentence(rnd, n):
+    return " ".join(rnd.choice(_WORDS) for _ in range(n)).capitalize() + "."
+
+
+def _desc_html(rnd, style, i):
+    para = " ".join(_sentence(rnd, rnd.randint(8, 18)) for _ in range(rnd.randint(1, 3)))
+    img = f'<img src="https://img.example.com/{style}/{i}.jpg" alt="g&ouml;rsel" width="640">'
+    gap = rnd.choice(_GAPS)
+    if style == "cdata_img":
+        return f"<p>{img}</p>{gap}<p>{para}</p>{gap}<!-- reklam -->{gap}<br/>"
+    if style == "entity_img":
+        para = para.replace("ü", "&uuml;").replace("ö", "&ouml;").replace(" ve ", " &amp; ")
+        return f"{img} {para}&nbsp;&#8230;{gap}<a href=\"https://x.example.com\">Devamı</a>"
+    if style == "media_content":
+        return f"{gap}<p>{para}</p>{gap}<script>var a=1;</script>{gap}"
+    return para
+
+
+# Sentetik feed'den geçmeyen ham açıklama örnekleri (XML ayrıştırıcı CRLF'yi
+# LF'ye çevirdiği için CRLF ancak böyle doğrudan denenebilir)
+DESC_EDGE_CASES = (
+    "<p>a</p>\n    <p>b</p>",
+    "<p>a</p>   <p>b</p>",
+    "<p>a</p>\r\n<p>b</p>",
+    "<p>a</p>\r<p>b</p>",
+    "<div>\r\n\t<p>a  b</p>\r\n\t<p> c </p>\r\n</div>\r\n",
+    "<p>a</p> <!-- x --> \n <p>b</p>",
+    "<pre>\n  </pre><p>a</p>\n<textarea>   </textarea>",
+    "<p>a</p><![CDATA[   ]]><p>b</p><![CDATA[ x ]]>",
+    "<p>a</p>&#32;&#32;<p>b</p>&#10;<p>c</p>&nbsp;<p>d</p>",
+    "<p>a</p> <script>\n</script> <p>b</p>",
+    "   metin   ",
+    "\n",
+)
+
+
+def synth_feed(source, category, n=40, seed=None):
+    """Yayıncı biçimine benzeyen deterministik RSS/Atom XML'i (bytes)."""
+    style = _STYLES.get(source, "plain")
+    rnd = random.Random(seed if seed is not None else f"{source}:{category}")
+    base = datetime(2025, 1, 15, 12, 0, tzinfo=timezone.utc)
+    entries = []
+    for i in range(n):
+        title = _sentence(rnd, rnd.randint(5, 10)).replace("&", "&amp;")
+        link = f"https://www.{source}.example.com/{category}/haber-{i}"
+        dt = base - timedelta(minutes=rnd.randint(1, 90) * (i + 1))
+        html = _desc_html(rnd, style, i)
+        if style == "atom_content":
+            entries.append(
+                f"<entry><title>{title}</title><link href=\"{link}\"/><id>{link}</id>"
+                f"<updated>{dt.isoformat()}</updated>"
+                f"<summary type=\"html\"><![CDATA[{html}]]></summary>"
+                f"<content type=\"html\"><![CDATA[<p><img src=\"https://img.example.com/ntv/{i}.jpg\"></p>{html}]]></content>"
+                f"</entry>"
+            )
+            continue
+        extra = ""
+        if style == "enclosure":
+            extra = f'<enclosure url="https://img.example.com/{source}/{i}.jpg" type="image/jpeg" length="0"/>'
+        elif style == "media_content":
+            extra = f'<media:content url="https://img.example.com/{source}/{i}.jpg" medium="image"/>'
+        entries.append(
+            f"<item><title>{title}</title><link>{link}</link><guid>{link}</guid>"
+            f"<pubDate>{format_datetime(dt)}</pubDate>{extra}"
+            f"<description><![CDATA[{html}]]></description></item>"
+        )
+
+    if style == "atom_content":
+        body = (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            f'<feed xmlns="http://www.w3.org/2005/Atom"><title>{source}</title>'
+            + "".join(entries)
+            + "</feed>"
+        )
+    else:
+        body = (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/">'
+            f"<channel><title>{source}</title>"
+            + "".join(entries)
+            + "</channel></rss>"
+        )
+    return body.encode("utf-8")
+
+
+def fixture_name(category, source):
+    return f"{category}__{source}.xml"
+
+
+def load_feed_fixtures(categories):
+    """
+    {(category, source): bytes} döndürür.
+    Kaydedilmiş dosya varsa onu, yoksa sentetik feed'i kullanır.
+    """
+    out = {}
+    for category, sources in categories.items():
+        for source in sources:
+            path = os.path.join(FEED_DIR, fixture_name(category, source))
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    out[(category, source)] = f.read()
+            else:
+                out[(category, source)] = synth_feed(source, category)
+    return out
+
+
+# ------------------------------------------------
+# Haber sayfaları
+# ------------------------------------------------
+ARTICLE_DIR = os.path.join(FIXTURE_DIR, "articles")
+ARTICLE_INDEX = os.path.join(ARTICLE_DIR, "index.json")
+
+_DATE_STYLES = ("jsonld", "meta", "text_tr", "text_dotted")
+
+
+def synth_article(url, paragraphs=12):
+    """Yayıncı haber sayfasına benzeyen deterministik HTML (str)."""
+    rnd = random.Random(url)
+    title = _sentence(rnd, rnd.randint(6, 11))
+    dt = datetime(2025, 1, 15, 12, 0, tzinfo=timezone.utc) - timedelta(minutes=rnd.randint(5, 5000))
+    style = _DATE_STYLES[rnd.randrange(len(_DATE_STYLES))]
+    head = [
+        f"<title>{title} - Haber</title>",
+        f'<meta property="og:title" content="{title}">',
+        f'<meta property="og:description" content="{_sentence(rnd, 20)}">',
+        f'<meta property="og:image" content="https://img.example.com/og/{rnd.randint(1, 10**6)}.jpg">',
+    ]
+    # Gerçek sayfalardaki gibi kalabalık <head>: script, stil, izleme kodları
+    head += [f'<link rel="preload" href="/static/{i}.js" as="script">' for i in range(15)]
+    head += ["<script>window.dataLayer=window.dataLayer||[];" + "x=1;" * 400 + "</script>"]
+    head += ["<style>" + ".c{color:red}" * 300 + "</style>"]
+    body_date = ""
+    if style == "jsonld":
+        head.append(
+            '<script type="application/ld+json">{"@context":"https://schema.org","@type":"NewsArticle",'
+            f'"headline":"{title}","datePublished":"{dt.isoformat()}","dateModified":"{dt.isoformat()}"}}</script>'
+        )
+    elif style == "meta":
+        head.append(f'<meta property="article:published_time" content="{dt.isoformat()}">')
+    elif style == "text_tr":
+        aylar = ["Ocak", "Şubat", "Mart", "Nisan", "Mayıs", "Haziran", "Temmuz", "Ağustos", "Eylül", "Ekim", "Kasım", "Aralık"]
+        body_date = f"<span>Giriş Tarihi: {dt.day} {aylar[dt.month - 1]} {dt.year} {dt:%H:%M}</span>"
+    else:
+        body_date = f"<span>{dt:%d.%m.%Y} - {dt:%H:%M}</span>"
+
+    nav = "".join(f'<li><a href="/kategori/{i}">{rnd.choice(_WORDS)}</a></li>' for i in range(60))
+    paras = "".join(f"<p>{_sentence(rnd, rnd.randint(15, 40))} {_sentence(rnd, 12)}</p>" for _ in range(paragraphs))
+    related = "".join(f'<div class="card"><a href="/haber/{i}"><p>{_sentence(rnd, 8)}</p></a></div>' for i in range(20))
+    return (
+        "<!DOCTYPE html><html lang=\"tr\"><head><meta charset=\"utf-8\">"
+        + "".join(head)
+        + f"</head><body><header><ul>{nav}</ul></header>"
+        + f'<main><h1>{title}</h1>{body_date}<div class="news-detail">{paras}</div>'
+        + f"<aside>{related}</aside></main><footer>{nav}</footer></body></html>"
+    )
+
+
+def load_article_index():
+    """Kaydedilmiş haber sayfaları: {orijinal url: dosya yolu}"""
+    if not os.path.exists(ARTICLE_INDEX):
+        return {}
+    import json
+
+    with open(ARTICLE_INDEX, encoding="utf-8") as f:
+        return {url: os.path.join(ARTICLE_DIR, name) for url, name in json.load(f).items()}
+
+
+def article_html(url, index=None):
+    """Kayıt varsa onu, yoksa sentetik sayfayı döndürür."""
+    index = load_article_index() if index is None else index
+    path = index.get(url)
+    if path and os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read().decode("utf-8", "replace")
+    return synth_article(url)
+
+
+DATE_SAMPLES = [
+    "2025-09-02T15:44:59+03:00",
+    "2025-09-02T12:44:59Z",
+    "02.09.2025 15:44:59",
+    "02.09.2025 15:44",
+    "02.09.2025",
+    "02/09/2025 15:44",
+    "2 Eylül 2025 15:44",
+    "Salı, 2 Eylül 2025 - 15:44",
+    "dün 14:30",
+    "3 saat önce",
+]
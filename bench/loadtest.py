@@ -0,0 +1,294 @@
+# ================================================
+# bench/loadtest.py - gunicorn yük / dayanıklılık testi
+# ================================================
+# Yayıncı ve DB stand-in'leriyle gunicorn'u farklı worker/thread ayarlarında
+# başlatır, eşzamanlı istemci sayısını kademeli artırır ve her kademe için
+# gecikme yüzdelikleri, hata oranı, thread sayısı ve RSS bellek kaydeder.
+# Gecikme çöktüğünde (p99 > --max-p99-ms veya hata > --max-error-rate)
+# o konfigürasyonun rampası durur. Sonuç: konfigürasyonlar arası kıyaslanabilir
+# JSON + markdown rapor.
+#
+#   python -m bench.loadtest --configs 1x1,2x4,4x8 --levels 1,5,10,25,50 --stage-seconds 15
+#   python -m bench.loadtest --url http://127.0.0.1:5000 --levels 10,50   # çalışan sunucuya
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.run import percentile  # noqa: E402
+from bench.standins import OpenAIStandIn, PublisherStandIn, make_db, seed_news  # noqa: E402
+
+
+# ------------------------------------------------
+# Süreç gözlemi (/proc)
+# ------------------------------------------------
+def _proc_status(pid):
+    out = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                k, _, v = line.partition(":")
+                out[k] = v.strip()
+    except OSError:
+        pass
+    return out
+
+
+def _children(pid):
+    kids = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                # comm parantez içinde boşluk içerebilir → son ')' sonrası
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[1]) == pid:
+                kids.append(int(name))
+        except (OSError, IndexError, ValueError):
+            continue
+    return kids
+
+
+def process_tree_usage(root_pid):
+    """gunicorn master + worker'ların toplam thread sayısı ve RSS'i (MB)"""
+    pids = [root_pid] + _children(root_pid)
+    threads = 0
+    rss_kb = 0
+    for pid in pids:
+        st = _proc_status(pid)
+        threads += int(st.get("Threads", "0") or 0)
+        rss_kb += int((st.get("VmRSS", "0 kB").split() or ["0"])[0])
+    return {"processes": len(pids), "threads": threads, "rss_mb": round(rss_kb / 1024, 1)}
+
+
+# ------------------------------------------------
+# İstek karışımı
+# ------------------------------------------------
+def build_mix(spec, categories, slugs):
+    """'rss:5,news:3,slug:2' → ağırlıklı URL üreticisi"""
+    makers = {
+        "rss": lambda: f"/rss?category={random.choice(categories)}",
+        "news": lambda: f"/news?category=all&limit=20&offset={random.randint(0, 200)}",
+        "slug": lambda: f"/news/slug/{random.choice(slugs)}",
+        "health": lambda: "/health/sources",
+    }
+    weighted = []
+    for part in spec.split(","):
+        name, _, weight = part.partition(":")
+        weighted += [makers[name.strip()]] * int(weight or 1)
+    return lambda: random.choice(weighted)()
+
+
+class LevelResult:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.errors = 0
+        self.samples = []
+
+    def add(self, latency, ok):
+        with self.lock:
+            self.latencies.append(latency)
+            if not ok:
+                self.errors += 1
+
+
+def run_level(base_url, concurrency, seconds, next_path, pid=None, timeout=30):
+    result = LevelResult()
+    stop_at = time.monotonic() + seconds
+
+    def client():
+        session = requests.Session()
+        while time.monotonic() < stop_at:
+            t0 = time.perf_counter()
+            try:
+                r = session.get(base_url + next_path(), timeout=timeout)
+                ok = r.status_code < 500
+            except requests.RequestException:
+                ok = False
+            result.add(time.perf_counter() - t0, ok)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    while time.monotonic() < stop_at:
+        if pid:
+            result.samples.append(dict(process_tree_usage(pid), t=round(time.monotonic(), 1)))
+        time.sleep(1)
+    for t in threads:
+        t.join(timeout + 5)
+
+    lat = sorted(result.latencies)
+    n = len(lat)
+    return {
+        "concurrency": concurrency,
+        "requests": n,
+        "rps": round(n / seconds, 1),
+        "p50_ms": round(percentile(lat, 50) * 1000, 1),
+        "p95_ms": round(percentile(lat, 95) * 1000, 1),
+        "p99_ms": round(percentile(lat, 99) * 1000, 1),
+        "error_rate": round(result.errors / n, 4) if n else 1.0,
+        "max_threads": max((s["threads"] for s in result.samples), default=None),
+        "max_rss_mb": max((s["rss_mb"] for s in result.samples), default=None),
+        "timeline": result.samples,
+    }
+
+
+# ------------------------------------------------
+# gunicorn
+# ------------------------------------------------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers, threads, worker_class, env):
+    port = _free_port()
+    cmd = [
+        sys.executable, "-m", "gunicorn", "bench.standin_app:app",
+        "-b", f"127.0.0.1:{port}", "-w", str(workers), "--threads", str(threads),
+        "-k", worker_class, "--timeout", "120", "--log-level", "warning",
+    ]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn başlamadı:\n" + proc.stderr.read().decode("utf-8", "replace")[-2000:])
+        try:
+            requests.get(base + "/health/sources", timeout=2)
+            return proc, base
+        except requests.RequestException:
+            time.sleep(0.3)
+    proc.kill()
+    raise RuntimeError("gunicorn 60 sn içinde cevap vermedi")
+
+
+def warm_up(base_url, categories, rounds):
+    """
+    İlk (soğuk) feed çekimlerini ölçümden ayırır. Bellek cache'inde her worker
+    kendi feed durumunu tuttuğundan istekler worker sayısı kadar tekrarlanır;
+    her istek yeni bağlantı açar ki farklı worker'lara dağılsın.
+    """
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for category in categories:
+            requests.get(f"{base_url}/rss?category={category}", timeout=120)
+    print(f"  ısınma: {time.perf_counter() - t0:.1f} sn")
+
+
+def ramp(base_url, levels, args, next_path, pid=None, workers=1):
+    if not args.cold:
+        warm_up(base_url, args.categories, workers * 2)
+    rows = []
+    for c in levels:
+        row = run_level(base_url, c, args.stage_seconds, next_path, pid)
+        rows.append(row)
+        print(
+            f"  c={c:<5} rps={row['rps']:<8} p50={row['p50_ms']:<8} p99={row['p99_ms']:<9}"
+            f" err={row['error_rate']:<7} threads={row['max_threads']} rss={row['max_rss_mb']}MB"
+        )
+        if row["p99_ms"] > args.max_p99_ms or row["error_rate"] > args.max_error_rate:
+            print("  ⛔ gecikme/hata eşiği aşıldı, rampa durduruldu")
+            break
+    ok = [r for r in rows if r["p99_ms"] <= args.max_p99_ms and r["error_rate"] <= args.max_error_rate]
+    return {"levels": rows, "max_sustainable_concurrency": ok[-1]["concurrency"] if ok else 0}
+
+
+def markdown(report, args):
+    lines = [
+        f"# Yük testi (karışım: {args.mix}, kademe: {args.stage_seconds} sn, p99 eşiği: {args.max_p99_ms} ms)",
+        "",
+        "| config | eşzamanlı | rps | p50 ms | p95 ms | p99 ms | hata | thread | RSS MB |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for name, res in report.items():
+        for r in res["levels"]:
+            lines.append(
+                f"| {name} | {r['concurrency']} | {r['rps']} | {r['p50_ms']} | {r['p95_ms']} | {r['p99_ms']}"
+                f" | {r['error_rate']:.2%} | {r['max_threads']} | {r['max_rss_mb']} |"
+            )
+    lines += ["", "| config | sürdürülebilir eşzamanlılık |", "|---|---|"]
+    lines += [f"| {name} | {res['max_sustainable_concurrency']} |" for name, res in report.items()]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--configs", default="1x1,2x4,4x8", help="workers x threads listesi")
+    ap.add_argument("--worker-class", default="gthread")
+    ap.add_argument("--levels", default="1,5,10,25,50,100")
+    ap.add_argument("--stage-seconds", type=float, default=15)
+    ap.add_argument("--mix", default="rss:5,news:3,slug:2")
+    ap.add_argument("--news-rows", type=int, default=2000)
+    ap.add_argument("--latency-ms", type=float, default=30, help="yayıncı stand-in gecikmesi")
+    ap.add_argument("--max-p99-ms", type=float, default=2000)
+    ap.add_argument("--max-error-rate", type=float, default=0.01)
+    ap.add_argument("--cold", action="store_true", help="ısınma isteklerini atla")
+    ap.add_argument("--url", help="gunicorn başlatma, bu adresteki sunucuyu test et")
+    ap.add_argument("--out", default="loadtest-report", help="rapor dosya öneki (.json / .md)")
+    ap.add_argument("--env", action="append", default=[], help="gunicorn ortamına KEY=VALUE (tekrarlanabilir)")
+    args = ap.parse_args()
+    levels = [int(x) for x in args.levels.split(",")]
+
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ.setdefault("SNAPSHOT_PATH", "")  # açılış davranışını ölçmek için --env SNAPSHOT_PATH=...
+    import server
+
+    categories = args.categories = list(server.RSS_CATEGORIES)
+    tmp = tempfile.mkdtemp(prefix="rss-load-")
+    db_path = make_db(os.path.join(tmp, "load.sqlite3"))
+    titles = seed_news(db_path, args.news_rows)
+    slugs = [server.slugify_title(t) for t in random.Random(1).sample(titles, min(200, len(titles)))]
+    next_path = build_mix(args.mix, categories, slugs)
+
+    report = {}
+    upstream = None
+    if args.url:
+        print(f"▶ {args.url}")
+        report["external"] = ramp(args.url.rstrip("/"), levels, args, next_path)
+    else:
+        publishers = PublisherStandIn(server.RSS_CATEGORIES, args.latency_ms)
+        openai_stub = OpenAIStandIn()
+        env = dict(
+            os.environ,
+            BENCH_PUBLISHER_BASE=publishers.base,
+            BENCH_DB_PATH=db_path,
+            OPENAI_BASE_URL=openai_stub.base_url,
+        )
+        env.update(kv.split("=", 1) for kv in args.env)
+        for config in args.configs.split(","):
+            workers, threads = (int(x) for x in config.lower().split("x"))
+            name = f"{workers}w x {threads}t ({args.worker_class})"
+            print(f"▶ {name}")
+            proc, base = start_gunicorn(workers, threads, args.worker_class, env)
+            try:
+                report[name] = ramp(base, levels, args, next_path, proc.pid, workers)
+            finally:
+                proc.terminate()
+                proc.wait(30)
+        upstream = publishers.requests
+
+    with open(args.out + ".json", "w", encoding="utf-8") as f:
+        json.dump({"args": vars(args), "results": report, "upstream_requests": upstream}, f, ensure_ascii=False, indent=1)
+    with open(args.out + ".md", "w", encoding="utf-8") as f:
+        f.write(markdown(report, args))
+    print(f"rapor: {args.out}.json, {args.out}.md")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# ================================================
+# bench/record.py - Gerçek RSS / haber sayfası fixture'larını kaydet
+# ================================================
+# Ağ erişimi olan bir makinede çalıştırılır; sonuçlar bench/fixtures/ altına
+# yazılır ve benchmark bundan sonra sentetik yerine bunları kullanır.
+#
+#   python -m bench.record [--articles-per-feed 3]
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+import feedparser  # noqa: E402
+
+import server  # noqa: E402
+from bench.fixtures import ARTICLE_DIR, ARTICLE_INDEX, FEED_DIR, fixture_name  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--articles-per-feed", type=int, default=3)
+    args = ap.parse_args()
+
+    os.makedirs(FEED_DIR, exist_ok=True)
+    os.makedirs(ARTICLE_DIR, exist_ok=True)
+    index = {}
+    if os.path.exists(ARTICLE_INDEX):
+        with open(ARTICLE_INDEX, encoding="utf-8") as f:
+            index = json.load(f)
+
+    for category, sources in server.RSS_CATEGORIES.items():
+        for source, info in sources.items():
+            try:
+                resp = requests.get(info["url"], timeout=20, headers=server.HTTP_HEADERS)
+                resp.raise_for_status()
+            except Exception as e:
+                print(f"⚠️ {category}/{source}: {e}")
+                continue
+            with open(os.path.join(FEED_DIR, fixture_name(category, source)), "wb") as f:
+                f.write(resp.content)
+            print(f"✅ {category}/{source}: {len(resp.content)} bayt")
+
+            for entry in feedparser.parse(resp.content).entries[: args.articles_per_feed]:
+                link = entry.get("link")
+                if not link or link in index:
+                    continue
+                try:
+                    page = requests.get(link, timeout=20, headers={"User-Agent": "Mozilla/5.0"})
+                    page.raise_for_status()
+                except Exception as e:
+                    print(f"   ⚠️ {link}: {e}")
+                    continue
+                name = hashlib.sha1(link.encode("utf-8")).hexdigest() + ".html"
+                with open(os.path.join(ARTICLE_DIR, name), "wb") as f:
+                    f.write(page.content)
+                index[link] = name
+
+    with open(ARTICLE_INDEX, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    print(f"{len(index)} haber sayfası kayıtlı")
+
+
+if __name__ == "__main__":
+    main()
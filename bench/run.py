@@ -0,0 +1,303 @@
+# ================================================
+# bench/run.py - Çevrimdışı performans benchmark'ı
+# ================================================
+# Yayıncılar, OpenAI ve MySQL yerel stand-in'lerle değiştirilir (bench/standins.py);
+# fixture'lar bench/fixtures/ altından (yoksa sentetik) gelir. Her aşama için
+# throughput, gecikme yüzdelikleri ve tepe bellek raporlanır; --baseline
+# dosyasına göre gerileme varsa çıkış kodu 1, baseline dosyası yoksa 2 olur
+# (karşılaştırmasız koşu için --no-baseline). bench/baseline.json repoda;
+# farklı donanımda koşan CI kendi makinesinde --save-baseline ile yenilemeli.
+#
+#   python -m bench.run                      # rapor + baseline karşılaştırması
+#   python -m bench.run --save-baseline      # mevcut sonuçları baseline yap
+#   python -m bench.run --no-baseline        # sadece rapor
+#   python -m bench.run --only feed_parse,rss_cold --json out.json
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.standins import OpenAIStandIn, PublisherStandIn, install, make_db  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "bench", "baseline.json")
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+class Bench:
+    def __init__(self, server, publishers, openai_stub, repeat):
+        self.server = server
+        self.publishers = publishers
+        self.openai_stub = openai_stub
+        self.repeat = repeat
+        self.tmp = tempfile.mkdtemp(prefix="rss-bench-")
+        self.feeds = list(publishers.feeds.items())
+        self.articles = publishers.article_urls()
+
+    # --- yardımcılar ---
+    def reset_caches(self):
+        s = self.server
+        s.CACHE = s.MemoryCache()
+        s._SOURCE_HEALTH.clear()
+
+    def fresh_db(self, name="bench"):
+        path = make_db(os.path.join(self.tmp, f"{name}.sqlite3"))
+        install(self.server, self.publishers, path)
+        return path
+
+    # --- aşamalar: her biri (ops listesi) döndüren fonksiyonlar ---
+    def stage_feed_parse(self):
+        s = self.server
+        return [lambda raw=raw, src=key[1]: s._parse_feed_payload(raw, src, {}) for key, raw in self.feeds]
+
+    def stage_image_extract(self):
+        import feedparser
+
+        s = self.server
+        entries = [e for _, raw in self.feeds for e in feedparser.parse(raw).entries]
+        return [lambda e=e: s._image_from_entry_markup(e) for e in entries]
+
+    def stage_fetch_single(self):
+        s = self.server
+        ops = []
+        for category, sources in s.RSS_CATEGORIES.items():
+            for source, info in sources.items():
+                ops.append(lambda source=source, info=info: s.fetch_single(source, info, force=True))
+        return ops
+
+    def stage_meta_parse(self):
+        s = self.server
+        pages = [self.publishers.article_body(u).decode("utf-8") for u in self.articles[:150]]
+        return [lambda html=html: s._parse_meta_payload(html) for html in pages]
+
+    def stage_extract_meta(self):
+        s = self.server
+
+        def op(url):
+            s.CACHE.delete(f"article:{url}")
+            return s.extract_meta_from_url(url)
+
+        return [lambda u=u: op(u) for u in self.articles[:150]]
+
+    def stage_parse_tr_date(self):
+        from bench.fixtures import DATE_SAMPLES
+
+        s = self.server
+        return [lambda d=d: s.parse_tr_date(d) for d in DATE_SAMPLES * 20]
+
+    def stage_dedupe(self):
+        s = self.server
+        items = []
+        for key, raw in self.feeds:
+            items.extend(s._parse_feed_payload(raw, key[1], {}))
+        items = items + items
+        return [lambda: s.dedupe_items(items) for _ in range(20)]
+
+    def stage_rss_cold(self):
+        s = self.server
+        client = s.app.test_client()
+
+        def op(category):
+            self.reset_caches()
+            r = client.get(f"/rss?category={category}")
+            assert r.status_code == 200, r.status_code
+
+        return [lambda c=c: op(c) for c in s.RSS_CATEGORIES]
+
+    def stage_rss_warm(self):
+        s = self.server
+        client = s.app.test_client()
+        for c in s.RSS_CATEGORIES:
+            client.get(f"/rss?category={c}")
+        return [lambda c=c: client.get(f"/rss?category={c}") for c in s.RSS_CATEGORIES]
+
+    def stage_parse_endpoint(self):
+        s = self.server
+        client = s.app.test_client()
+
+        def op(url):
+            s.CACHE.delete(f"article:{url}")
+            r = client.get("/parse", query_string={"url": url})
+            assert r.status_code == 200, r.get_data(as_text=True)[:200]
+
+        return [lambda u=u: op(u) for u in self.articles[:100]]
+
+    def stage_cron(self):
+        s = self.server
+        client = s.app.test_client()
+
+        def op():
+            self.reset_caches()
+            self.fresh_db()
+            r = client.get("/cron?category=kultursanat")
+            assert r.status_code == 200 and r.json["saved"] > 0, r.get_data(as_text=True)[:200]
+
+        return [op]
+
+    STAGES = (
+        "feed_parse", "image_extract", "fetch_single", "meta_parse", "extract_meta",
+        "parse_tr_date", "dedupe", "rss_cold", "rss_warm", "parse_endpoint", "cron",
+    )
+
+    def run_stage(self, name):
+        build = getattr(self, "stage_" + name)
+        self.reset_caches()
+        self.fresh_db()
+        ops = build()
+        for op in ops[: max(1, len(ops) // 10)]:  # ısınma
+            op()
+
+        latencies = []
+        t_start = time.perf_counter()
+        for _ in range(self.repeat):
+            for op in ops:
+                t0 = time.perf_counter()
+                op()
+                latencies.append(time.perf_counter() - t0)
+        total = time.perf_counter() - t_start
+
+        # Bellek ölçümü ayrı turda (tracemalloc süreleri bozar)
+        self.reset_caches()
+        ops = build()
+        gc.collect()
+        tracemalloc.start()
+        for op in ops:
+            op()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            "ops": len(latencies),
+            "throughput": round(len(latencies) / total, 2) if total else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "peak_kb": round(peak / 1024, 1),
+        }
+
+
+def metrics_summary(server):
+    """server.py'nin kendi metriklerinden aşama ortalamaları"""
+    out = {}
+    for name, m in server.METRICS.items():
+        if m.kind != "histogram":
+            continue
+        count = sum(v[2] for v in m.series.values())
+        total = sum(v[1] for v in m.series.values())
+        if count:
+            out[name] = {"count": count, "mean_ms": round(total / count * 1000, 3)}
+    return out
+
+
+# Milisaniye altı aşamalarda zamanlayıcı gürültüsü yüzde toleransı aşar
+SLACK_MS = 1.0
+
+
+def compare(results, baseline, tolerance):
+    """Gerilemeleri listeler: p50 / throughput / peak bellek"""
+    problems = []
+    for stage, cur in results.items():
+        base = baseline.get(stage)
+        if not base:
+            continue
+        if cur["p50_ms"] > base["p50_ms"] * (1 + tolerance) + SLACK_MS:
+            problems.append(f"{stage}: p50 {base['p50_ms']} → {cur['p50_ms']} ms")
+        # throughput → op başına ortalama süre üzerinden (aynı mutlak pay)
+        if 1000 / max(cur["throughput"], 1e-9) > 1000 / max(base["throughput"], 1e-9) * (1 + tolerance) + SLACK_MS:
+            problems.append(f"{stage}: throughput {base['throughput']} → {cur['throughput']} op/sn")
+        if cur["peak_kb"] > base["peak_kb"] * (1 + tolerance) + 256:
+            problems.append(f"{stage}: bellek {base['peak_kb']} → {cur['peak_kb']} KB")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--only", help="virgülle ayrılmış aşama listesi")
+    ap.add_argument("--latency-ms", type=float, default=0, help="yayıncı stand-in gecikmesi")
+    ap.add_argument("--openai-latency-ms", type=float, default=0)
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--no-baseline", action="store_true", help="baseline karşılaştırması yapma")
+    ap.add_argument("--tolerance", type=float, default=0.3)
+    ap.add_argument("--json", help="sonuçları bu dosyaya da yaz")
+    ap.add_argument("--verbose", action="store_true", help="server.py print çıktılarını da göster")
+    args = ap.parse_args()
+
+    openai_stub = OpenAIStandIn(args.openai_latency_ms)
+    os.environ["OPENAI_BASE_URL"] = openai_stub.base_url
+    os.environ["OPENAI_API_KEY"] = "bench"
+    os.environ.setdefault("CACHE_BACKEND", "memory")
+    os.environ["POLL_SCHEDULER"] = "0"
+    # Soğuk ölçümler önceki koşunun feed anlık görüntüsünden etkilenmesin
+    os.environ["SNAPSHOT_PATH"] = ""
+    import server
+
+    publishers = PublisherStandIn(server.RSS_CATEGORIES, args.latency_ms)
+    install(server, publishers)
+    bench = Bench(server, publishers, openai_stub, args.repeat)
+
+    stages = args.only.split(",") if args.only else Bench.STAGES
+    results = {}
+    print(f"{'aşama':<16}{'op':>7}{'op/sn':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'tepe KB':>11}")
+    for name in stages:
+        # server.py'nin print'leri tabloyu boğmasın
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else open(os.devnull, "w")):
+            r = bench.run_stage(name)
+        results[name] = r
+        print(
+            f"{name:<16}{r['ops']:>7}{r['throughput']:>11}{r['p50_ms']:>10}"
+            f"{r['p95_ms']:>10}{r['p99_ms']:>10}{r['peak_kb']:>11}"
+        )
+
+    report = {"stages": results, "server_metrics": metrics_summary(server), "upstream_requests": publishers.requests}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"baseline yazıldı: {args.baseline}")
+        return 0
+
+    if args.no_baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        # Sessizce geçmek gerilemeyi gizler
+        print(f"⚠️ baseline bulunamadı: {args.baseline} (--save-baseline ile üretin ya da --no-baseline verin)")
+        return 2
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    missing = [stage for stage in results if stage not in baseline]
+    if missing:
+        print("⚠️ baseline'da olmayan aşamalar karşılaştırılmadı:", ", ".join(missing))
+    problems = compare(results, baseline, args.tolerance)
+    if problems:
+        print("❌ Gerileme:")
+        for p in problems:
+            print("  -", p)
+        return 1
+    print("✅ baseline'a göre gerileme yok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
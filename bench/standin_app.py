@@ -0,0 +1,20 @@
+# ================================================
+# bench/standin_app.py - gunicorn ile yük testi için WSGI girişi
+# ================================================
+# server.app'i, bench/loadtest.py'nin başlattığı stand-in'lere bağlı olarak
+# sunar:  gunicorn bench.standin_app:app
+#   BENCH_PUBLISHER_BASE  yayıncı stand-in'inin adresi (http://127.0.0.1:port)
+#   BENCH_DB_PATH         haberList içeren SQLite dosyası
+#   OPENAI_BASE_URL       OpenAI stand-in'i (isteğe bağlı)
+
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ.setdefault("SNAPSHOT_PATH", "")  # açılış davranışını ölçmek için --env SNAPSHOT_PATH=...
+
+import server  # noqa: E402
+from bench.standins import install  # noqa: E402
+
+install(server, os.environ["BENCH_PUBLISHER_BASE"], os.environ.get("BENCH_DB_PATH"))
+
+app = server.app
@@ -0,0 +1,350 @@
+# ================================================
+# bench/standins.py - Benchmark için yerel yayıncı / OpenAI / DB
+# ================================================
+# - PublisherStandIn: RSS_CATEGORIES'teki her feed'i ve haber sayfalarını
+#   yerel HTTP sunucusundan verir (ETag/304, isteğe bağlı gecikme).
+# - OpenAIStandIn: /v1/chat/completions taklidi (JSON cevap + usage).
+# - SQLiteMySQL: server.py'nin kullandığı MySQL sorgularını SQLite üzerinde
+#   çalıştıran pymysql benzeri bağlantı (DictCursor, %s parametreleri).
+# install() bunları server modülüne bağlar; server'ın kendisi değişmez.
+
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench.fixtures import article_html, load_article_index, load_feed_fixtures
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Sınırlı okuma yapan istemci bağlantıyı yarıda kapatır → beklenen durum
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def _serve(handler_cls, **attrs):
+    handler = type(handler_cls.__name__, (handler_cls,), attrs)
+    srv = _QuietServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=srv.serve_forever, name=handler_cls.__name__, daemon=True).start()
+    return srv
+
+
+def _sleep(latency_ms):
+    if latency_ms:
+        # ±%50 sapma: gerçek yayıncılar gibi düzensiz
+        time.sleep(latency_ms / 1000.0 * random.uniform(0.5, 1.5))
+
+
+# ------------------------------------------------
+# Yayıncılar
+# ------------------------------------------------
+class _PublisherHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    stand_in = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", ctype="text/html; charset=utf-8", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_GET(self):
+        si = self.stand_in
+        si.count(self.path.split("/")[1] if "/" in self.path else "?")
+        _sleep(si.latency_ms)
+        parts = self.path.split("?")[0].split("/")
+        if len(parts) == 4 and parts[1] == "feed":
+            body = si.feed_body(parts[2], parts[3])
+            if body is None:
+                return self._send(404)
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers={"ETag": etag})
+            return self._send(200, body, "application/rss+xml; charset=utf-8", {"ETag": etag})
+        if len(parts) > 3 and parts[1] == "site":
+            url = parts[2] + "://" + "/".join(parts[3:])
+            return self._send(200, si.article_body(url))
+        return self._send(404)
+
+    do_HEAD = do_GET
+
+
+class PublisherStandIn:
+    def __init__(self, categories, latency_ms=0):
+        self.latency_ms = latency_ms
+        self.feeds = load_feed_fixtures(categories)
+        self.article_index = load_article_index()
+        self.articles = {}
+        self.requests = {}
+        self.lock = threading.Lock()
+        self.server = _serve(_PublisherHandler, stand_in=self)
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        self._rewritten = {}
+
+    def count(self, kind):
+        with self.lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def feed_url(self, category, source):
+        return f"{self.base}/feed/{category}/{source}"
+
+    def feed_body(self, category, source):
+        key = (category, source)
+        if key not in self._rewritten:
+            raw = self.feeds.get(key)
+            if raw is None:
+                return None
+            # Haber linkleri de stand-in'e gitsin (namespace URI'leri http:// → dokunulmaz)
+            self._rewritten[key] = raw.replace(b"https://", f"{self.base}/site/https/".encode())
+        return self._rewritten[key]
+
+    def article_body(self, url):
+        body = self.articles.get(url)
+        if body is None:
+            body = self.articles[url] = article_html(url, self.article_index).encode("utf-8")
+        return body
+
+    def article_urls(self, limit=None):
+        """Feed fixture'larındaki haber linkleri (stand-in adresleriyle)"""
+        out = []
+        for category, source in self.feeds:
+            body = self.feed_body(category, source).decode("utf-8", "replace")
+            out.extend(re.findall(r"<link>([^<]+/site/[^<]+)</link>", body))
+            out.extend(re.findall(r'<link href="([^"]+/site/[^"]+)"', body))
+        return out[:limit] if limit else out
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+# ------------------------------------------------
+# OpenAI
+# ------------------------------------------------
+class _OpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    stand_in = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        req = json.loads(self.rfile.read(length) or b"{}")
+        self.stand_in.calls += 1
+        _sleep(self.stand_in.latency_ms)
+        user = next((m["content"] for m in req.get("messages", []) if m.get("role") == "user"), "")
+        title = (user.splitlines() or [""])[0][:120]
+        content = json.dumps(
+            {"title": f"{title} (AI)", "body": (user + "\n\n") * 3, "category": "gündem"},
+            ensure_ascii=False,
+        )
+        prompt_tokens = max(1, len(user) // 4)
+        body = json.dumps(
+            {
+                "id": f"chatcmpl-bench-{self.stand_in.calls}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": req.get("model", "gpt-4o-mini"),
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": prompt_tokens * 3,
+                    "total_tokens": prompt_tokens * 4,
+                },
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class OpenAIStandIn:
+    def __init__(self, latency_ms=0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self.server = _serve(_OpenAIHandler, stand_in=self)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+# ------------------------------------------------
+# MySQL uyumlu DB (SQLite)
+# ------------------------------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS haberList (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    slug TEXT,
+    content TEXT NOT NULL,
+    image TEXT,
+    category TEXT,
+    published_at TEXT,
+    link TEXT UNIQUE,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_haber_published ON haberList (published_at);
+CREATE INDEX IF NOT EXISTS idx_haber_category ON haberList (category, published_at);
+"""
+
+
+class DuplicateEntry(Exception):
+    """MySQL'in 'Duplicate entry' hatasını taklit eder (save_ai_news buna bakar)."""
+
+
+def _translate(query):
+    q = query.replace("%s", "?")
+    q = re.sub(r"\bINSERT\s+IGNORE\b", "INSERT OR IGNORE", q, flags=re.I)
+    q = re.sub(r"\bNOW\(\)", "CURRENT_TIMESTAMP", q, flags=re.I)
+    return q
+
+
+def _adapt(v):
+    return v.isoformat(" ") if isinstance(v, datetime) else v
+
+
+class _Cursor:
+    def __init__(self, conn, timed):
+        self.conn = conn
+        self.timed = timed
+        self.cur = None
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, args=None):
+        op = query.split(None, 1)[0].upper() if query.strip() else "?"
+        with self.timed("db_query_seconds", op=op):
+            try:
+                self.cur = self.conn.execute(_translate(query), tuple(_adapt(a) for a in (args or ())))
+            except sqlite3.IntegrityError as e:
+                raise DuplicateEntry(f"Duplicate entry: {e}") from e
+        self.rowcount = self.cur.rowcount
+        self.lastrowid = self.cur.lastrowid
+        return self.rowcount
+
+    def _row(self, row):
+        return {d[0]: v for d, v in zip(self.cur.description, row)}
+
+    def fetchone(self):
+        row = self.cur.fetchone()
+        return self._row(row) if row is not None else None
+
+    def fetchall(self):
+        return [self._row(r) for r in self.cur.fetchall()]
+
+
+class SQLiteMySQL:
+    """pymysql.connect(...) dönüşünün benchmark'ta kullanılan alt kümesi."""
+
+    def __init__(self, path, timed):
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("BEGIN")
+        self.timed = timed
+
+    def cursor(self):
+        return _Cursor(self.conn, self.timed)
+
+    def commit(self):
+        if self.conn.in_transaction:
+            self.conn.execute("COMMIT")
+        self.conn.execute("BEGIN")
+
+    def close(self):
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+        self.conn.close()
+
+
+def make_db(path):
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.close()
+    return path
+
+
+# ------------------------------------------------
+# Kurulum
+# ------------------------------------------------
+def seed_news(path, count):
+    """haberList'e count adet sentetik kayıt ekler (/news, /news/slug yükü için)"""
+    import random as _random
+
+    from bench.fixtures import _sentence
+
+    rnd = _random.Random(count)
+    categories = ["gündem", "spor", "ekonomi", "dünya", "magazin", "sağlık", "teknoloji"]
+    rows = []
+    for i in range(count):
+        title = f"{_sentence(rnd, rnd.randint(5, 10))} {i}"
+        slug = re.sub(r"[^a-z0-9-]", "", title.lower().replace(" ", "-"))
+        content = " ".join(_sentence(rnd, 20) for _ in range(30))
+        published = datetime(2025, 1, 1).timestamp() + i * 600
+        rows.append(
+            (
+                title, slug, content, f"https://img.example.com/{i}.jpg", rnd.choice(categories),
+                datetime.fromtimestamp(published).isoformat(" "), f"https://example.com/haber/{i}",
+                datetime.fromtimestamp(published).isoformat(" "),
+            )
+        )
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO haberList (title, slug, content, image, category, published_at, link, created_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+def install(server, publishers, db_path=None):
+    """
+    server modülünü stand-in'lere bağlar: feed URL'leri yerel sunucuya,
+    get_db_connection SQLite'a. publishers bir PublisherStandIn ya da başka
+    süreçte çalışan stand-in'in taban adresi olabilir. (OpenAI için
+    OPENAI_BASE_URL server import edilmeden önce ayarlanmalı.)
+    """
+    base = publishers if isinstance(publishers, str) else publishers.base
+    for category, sources in server.RSS_CATEGORIES.items():
+        for source, info in sources.items():
+            info["url"] = f"{base}/feed/{category}/{source}"
+    if db_path:
+        def get_db_connection():
+            with server.timed("db_connect_seconds"):
+                return SQLiteMySQL(db_path, server.timed)
+
+        server.get_db_connection = get_db_connection
+        server._cron_tables_ready = False
@@ -0,0 +1,30 @@
+# ================================================
+# gunicorn.conf.py - `gunicorn server:app` bu dosyayı otomatik okur
+# ================================================
+import os
+
+# PRELOAD=1 → server.py master'da bir kez import edilir ve ön yüklenir
+# (server.warmup), worker'lar modülleri fork sonrası copy-on-write paylaşır.
+preload_app = os.environ.get("PRELOAD", "0") == "1"
+
+# /stream (SSE) bağlantısı STREAM_MAX_SECONDS boyunca açık kalır. Varsayılan
+# sync worker her bağlantıda tek isteğe kilitlenir ve `timeout` dolunca
+# öldürülür → thread'li worker şart. GUNICORN_WORKER_CLASS=gevent de olur
+# (bağlantı başına greenlet; gevent kurulu olmalı).
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", "64"))
+
+# Eşzamanlı /stream istemcisi sınırı worker başınadır (toplam = worker sayısı
+# × sınır; worker sayısı WEB_CONCURRENCY). gthread'de her açık stream bir
+# thread tutar; normal istekler aç kalmasın diye STREAM_RESERVED_THREADS
+# thread ayrılır: varsayılan sınır = threads - 16 (64 thread → 48 stream).
+# STREAM_MAX_CLIENTS açıkça verilirse ona dokunulmaz. server.py bu değeri
+# worker'da ortamdan okur; sınır dolunca /stream 503 döner.
+if worker_class == "gthread":
+    reserved = int(os.environ.get("STREAM_RESERVED_THREADS", "16"))
+    os.environ.setdefault("STREAM_MAX_CLIENTS", str(max(1, threads - reserved)))
+
+# Worker zaman aşımı en uzun stream'den uzun olmalı (sync/gevent'te istek
+# süresince heartbeat gitmeyebilir)
+timeout = int(float(os.environ.get("STREAM_MAX_SECONDS", "600"))) + 60
+graceful_timeout = 30
@@ -2,31 +2,138 @@
 # server.py - Haber API (RSS + Parse + Rewrite)
 # ================================================
 
-from flask import Flask, jsonify, request
+import time
+_BOOT_STARTED = time.perf_counter()
+
+from flask import Flask, Response, g, jsonify, redirect, request, send_file, stream_with_context
 from flask_cors import CORS
 import requests
-import feedparser
-from bs4 import BeautifulSoup
-from datetime import datetime, timezone
-from email.utils import parsedate_to_datetime
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from xml.sax.saxutils import escape as xml_escape
+from html.parser import HTMLParser
 import pytz
-from dateutil import tz
 
 import os
 import concurrent.futures
-from openai import OpenAI
-import pymysql
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
+import random
+import bisect
+import statistics
+from urllib.parse import urlencode, urljoin, urlparse
+import importlib
 import os
 import re
-import dateparser
 import json
+import gzip
+from contextlib import contextmanager
+import contextvars
+import cProfile
+import hmac
+import io
+import pstats
+import sys
+import hashlib
+import base64
+import functools
+import ipaddress
+import heapq
+import socket
+import uuid
+import sqlite3
+import mmap
+import struct
+import zlib
+import atexit
+
+try:
+    import brotli
+except ImportError:  # brotli yoksa sadece gzip
+    brotli = None
+
+
+# =================================================
+# Tembel (lazy) importlar
+# =================================================
+# dateparser (dil verisi ~0.5 sn), openai (~0.8 sn), bs4, feedparser ve
+# pymysql modül yüklenirken değil ilk kullanımda import edilir: /news gibi
+# uçlar worker açılır açılmaz cevap verir, parse havuzu süreçleri de
+# sadece ihtiyaç duydukları modülleri yükler. PRELOAD=1 hepsini açılışta
+# yükler (bkz. warmup).
+IMPORT_TIMES = {}
+_import_lock = threading.RLock()
+# forkserver/spawn ile açılan parse havuzu süreçleri de bu modülü import eder
+IN_POOL_CHILD = multiprocessing.parent_process() is not None
+
+
+class _LazyModule:
+    """İlk öznitelik erişiminde import edilen modül vekili."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    t0 = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    IMPORT_TIMES[self._name] = time.perf_counter() - t0
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+dateparser = _LazyModule("dateparser")
+feedparser = _LazyModule("feedparser")
+bs4 = _LazyModule("bs4")
+openai = _LazyModule("openai")
+pymysql = _LazyModule("pymysql")
+_LAZY_MODULES = (dateparser, feedparser, bs4, openai, pymysql)
+# Sadece /img küçük görsel üretiminde (Pillow opsiyonel; yoksa orijinale yönlendirilir)
+PIL_Image = _LazyModule("PIL.Image")
+PIL_ImageOps = _LazyModule("PIL.ImageOps")
 
 
 # =================================================
 # OpenAI client
 # =================================================
 # Railway dashboard → Variables → OPENAI_API_KEY tanımlanmalı
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+_openai_client = None
+
+
+def get_openai_client():
+    """OpenAI client'ı ilk çağrıda kurar (import + kurulum açılışı yavaşlatmasın)"""
+    global _openai_client
+    if _openai_client is None:
+        with _import_lock:
+            if _openai_client is None:
+                _openai_client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    return _openai_client
+
+
+def openai_chat(endpoint, **kwargs):
+    """client.chat.completions.create + süre / token / hata metrikleri"""
+    t0 = time.perf_counter()
+    try:
+        completion = get_openai_client().chat.completions.create(**kwargs)
+    except Exception:
+        inc("openai_errors_total", endpoint=endpoint)
+        raise
+    finally:
+        observe("openai_request_seconds", time.perf_counter() - t0, endpoint=endpoint)
+    usage = getattr(completion, "usage", None)
+    if usage is not None:
+        inc("openai_tokens_total", usage.prompt_tokens or 0, endpoint=endpoint, type="prompt")
+        inc("openai_tokens_total", usage.completion_tokens or 0, endpoint=endpoint, type="completion")
+    return completion
+
+
 TR_SETTINGS = {
     "TIMEZONE": "Europe/Istanbul",
     "TO_TIMEZONE": "Europe/Istanbul",
@@ -64,17 +171,18 @@ def parse_tr_date(txt):
 
     # 4) Son çare: dateparser (Türkçe + DMY)
     try:
-        dt = dateparser.parse(
-            s,
-            languages=["tr"],
-            settings={
-                "TIMEZONE": "Europe/Istanbul",
-                "TO_TIMEZONE": "Europe/Istanbul",
-                "RETURN_AS_TIMEZONE_AWARE": True,
-                "PREFER_DATES_FROM": "past",
-                "DATE_ORDER": "DMY",
-            },
-        )
+        with timed("dateparser_seconds"):
+            dt = dateparser.parse(
+                s,
+                languages=["tr"],
+                settings={
+                    "TIMEZONE": "Europe/Istanbul",
+                    "TO_TIMEZONE": "Europe/Istanbul",
+                    "RETURN_AS_TIMEZONE_AWARE": True,
+                    "PREFER_DATES_FROM": "past",
+                    "DATE_ORDER": "DMY",
+                },
+            )
         return dt
     except Exception:
         return None
@@ -126,7 +234,34 @@ def _jsonld_dates(soup):
 app = Flask(__name__)
 # CORS ayarları → hem localhost hem resulkacar.com için izin ver
 CORS(app, resources={r"/*": {"origins": "*"}})
-print("🔑 OPENAI_API_KEY:", os.environ.get("OPENAI_API_KEY"))
+if not IN_POOL_CHILD:
+    print("🔑 OPENAI_API_KEY:", os.environ.get("OPENAI_API_KEY"))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def observe_request(response):
+    started = getattr(g, "request_started", None)
+    if started is not None:
+        observe(
+            "http_request_seconds",
+            time.perf_counter() - started,
+            endpoint=request.endpoint or "not_found",
+            status=str(response.status_code),
+        )
+    flush_metrics_snapshot()
+    return response
+
+
+@app.before_request
+def ensure_background_jobs():
+    # Thread'ler fork'tan sağ çıkmaz → gunicorn worker'ında ilk istekte başlat
+    if POLL_SCHEDULER:
+        start_poll_scheduler()
+
 
 @app.after_request
 def apply_cors(response):
@@ -135,6 +270,64 @@ def apply_cors(response):
     response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
     return response
 
+# =================================================
+# HTTP önbellek: ETag / 304 / Cache-Control / sıkıştırma
+# =================================================
+# Endpoint → Cache-Control. Listede olmayan endpoint'lere dokunulmaz.
+HTTP_CACHE_POLICY = {
+    "get_rss": "public, max-age=60, stale-while-revalidate=120",
+    "get_saved_news": "public, max-age=60, stale-while-revalidate=300",
+    "get_news_by_slug": "public, max-age=300, stale-while-revalidate=3600",
+    "get_news_by_id": "public, max-age=300, stale-while-revalidate=3600",
+    "search_news": "public, max-age=60, stale-while-revalidate=300",
+}
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+
+
+def _pick_encoding(body):
+    if len(body) < COMPRESS_MIN_BYTES:
+        return None
+    if brotli is not None and request.accept_encodings["br"] > 0:
+        return "br"
+    if request.accept_encodings["gzip"] > 0:
+        return "gzip"
+    return None
+
+
+@app.after_request
+def apply_http_cache(response):
+    policy = HTTP_CACHE_POLICY.get(request.endpoint)
+    if (
+        policy is None
+        or request.method not in ("GET", "HEAD")
+        or response.status_code != 200
+        or response.is_streamed
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    body = response.get_data()
+    encoding = _pick_encoding(body)
+    response.headers["Cache-Control"] = policy
+    response.vary.add("Accept-Encoding")
+    # Güçlü ETag içerikten; her sıkıştırma biçimi ayrı temsil → ayrı ETag
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+
+    response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+
+    if encoding == "br":
+        response.set_data(brotli.compress(body, quality=5))
+    elif encoding == "gzip":
+        response.set_data(gzip.compress(body, compresslevel=6))
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
 # Türkiye saat dilimi
 LOCAL_TZ = pytz.timezone("Europe/Istanbul")
 
@@ -144,6 +337,961 @@ HTTP_HEADERS = {
     "Accept": "application/rss+xml, application/xml;q=0.9, */*;q=0.8",
 }
 
+# =================================================
+# Metrikler (Prometheus metin formatı → /metrics)
+# =================================================
+# Aşama bazında histogram/sayaçlar. Parse havuzundaki süreçlerde ölçülenler
+# sonuçla birlikte ana sürece taşınır. Önbellek paylaşımlıysa her worker
+# anlık görüntüsünü önbelleğe yazar, /metrics hepsini toplayıp döner.
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "10"))
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def inc(self, labels, amount=1):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def snapshot(self):
+        with self.lock:
+            return [[dict(k), v] for k, v in self.series.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, labels, value):
+        key = tuple(sorted(labels.items()))
+        idx = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            s = self.series.get(key)
+            if s is None:
+                s = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][idx] += 1
+            s[1] += value
+            s[2] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return [[dict(k), list(v[0]), v[1], v[2]] for k, v in self.series.items()]
+
+
+METRICS = {}
+for _m in (
+    Histogram("http_request_seconds", "Flask istek süresi"),
+    Histogram("upstream_fetch_seconds", "Yayıncıya yapılan HTTP isteği süresi"),
+    Counter("upstream_errors_total", "Başarısız upstream istekleri"),
+    Counter("upstream_skipped_total", "Devre açık olduğu için atlanan istekler"),
+    Counter("upstream_bytes_total", "Upstream'den okunan gövde baytları (açılmış)"),
+    Counter("upstream_truncated_total", "Bayt sınırına takılan indirmeler"),
+    Histogram("feed_parse_seconds", "feedparser.parse süresi"),
+    Counter("image_fallback_total", "og:image için sayfa indirilen kayıtlar"),
+    Histogram("extract_meta_seconds", "extract_meta_from_url toplam süresi"),
+    Histogram("article_parse_seconds", "Haber sayfası HTML ayrıştırma süresi"),
+    Histogram("dateparser_seconds", "parse_tr_date içindeki dateparser fallback süresi"),
+    Histogram("openai_request_seconds", "OpenAI chat.completions süresi", (0.5, 1, 2, 5, 10, 20, 30, 60, 120)),
+    Counter("openai_tokens_total", "OpenAI token kullanımı"),
+    Counter("openai_errors_total", "Başarısız OpenAI çağrıları"),
+    Histogram("db_connect_seconds", "MySQL bağlantı kurma süresi"),
+    Histogram("db_query_seconds", "MySQL sorgu süresi"),
+    Counter("cache_requests_total", "Önbellek okumaları (hit/miss)"),
+    Counter("snapshot_restored_total", "Diskteki anlık görüntüden geri yüklenen feed durumları"),
+    Histogram("snapshot_write_seconds", "Feed anlık görüntüsünü yazma süresi"),
+    Histogram("search_query_seconds", "/news/search indeks sorgu süresi"),
+    Histogram("thumbnail_seconds", "/img küçük görsel üretim süresi"),
+):
+    METRICS[_m.name] = _m
+
+# Parse havuzu süreçlerinde ölçümler burada biriktirilip geri taşınır
+_metric_sink = threading.local()
+
+# Profil açıksa: istek boyunca gözlenen aşamalar (yavaş istek dökümü için)
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+_request_stages = contextvars.ContextVar("request_stages", default=None)
+
+
+def submit_in_context(executor, fn, *args):
+    """executor.submit, ama çağıranın contextvar'larıyla (aşama kaydı thread'lere geçsin)"""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def observe(name, value, **labels):
+    sink = getattr(_metric_sink, "records", None)
+    if sink is not None:
+        sink.append(("observe", name, value, labels))
+        return
+    METRICS[name].observe(labels, value)
+    if PROFILE_TOKEN:
+        stages = _request_stages.get()
+        if stages is not None:
+            stages.append((name, labels, value))
+
+
+def inc(name, amount=1, **labels):
+    sink = getattr(_metric_sink, "records", None)
+    if sink is not None:
+        sink.append(("inc", name, amount, labels))
+        return
+    METRICS[name].inc(labels, amount)
+
+
+@contextmanager
+def timed(name, **labels):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0, **labels)
+
+
+def _replay_metrics(records):
+    for kind, name, value, labels in records:
+        if kind == "observe":
+            observe(name, value, **labels)
+        else:
+            inc(name, value, **labels)
+
+
+def metrics_snapshot():
+    return {
+        name: {
+            "type": m.kind,
+            "help": m.help,
+            "buckets": list(getattr(m, "buckets", ())),
+            "series": m.snapshot(),
+        }
+        for name, m in METRICS.items()
+    }
+
+
+def _merge_snapshots(snapshots):
+    merged = {}
+    for snap in snapshots:
+        for name, metric in snap.items():
+            dst = merged.setdefault(name, dict(metric, series={}))
+            for row in metric["series"]:
+                key = tuple(sorted(row[0].items()))
+                cur = dst["series"].get(key)
+                if cur is None:
+                    dst["series"][key] = [row[0]] + [list(x) if isinstance(x, list) else x for x in row[1:]]
+                elif metric["type"] == "counter":
+                    cur[1] += row[1]
+                else:
+                    cur[1] = [a + b for a, b in zip(cur[1], row[1])]
+                    cur[2] += row[2]
+                    cur[3] += row[3]
+    return merged
+
+
+def _fmt_labels(labels, extra=None):
+    items = list(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+def render_prometheus(merged):
+    lines = []
+    for name, metric in sorted(merged.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for row in metric["series"].values():
+            labels = row[0]
+            if metric["type"] == "counter":
+                lines.append(f"{name}{_fmt_labels(labels)} {row[1]}")
+                continue
+            cumulative = 0
+            for le, n in zip(list(metric["buckets"]) + ["+Inf"], row[1]):
+                cumulative += n
+                lines.append(f"{name}_bucket{_fmt_labels(labels, {'le': le})} {cumulative}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {row[2]}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {row[3]}")
+    return "\n".join(lines) + "\n"
+
+
+_metrics_flushed_at = 0.0
+
+
+def flush_metrics_snapshot(force=False):
+    """Paylaşımlı önbellekte bu worker'ın metrik görüntüsünü tazele"""
+    global _metrics_flushed_at
+    if not CACHE.shared:
+        return
+    now = time.monotonic()
+    if not force and now - _metrics_flushed_at < METRICS_FLUSH_SECONDS:
+        return
+    _metrics_flushed_at = now
+    me = _owner_id()
+    ttl = METRICS_FLUSH_SECONDS * 6
+    cache_set("metrics", me, metrics_snapshot(), ttl)
+    # Worker listesi: her flush kendini yeniden ekler, ölen worker'lar TTL ile düşer
+    workers = [w for w in (cache_get("metrics", "workers") or []) if w != me]
+    cache_set("metrics", "workers", workers + [me], ttl)
+
+
+def collect_metrics():
+    if not CACHE.shared:
+        return _merge_snapshots([metrics_snapshot()])
+    flush_metrics_snapshot(force=True)
+    snapshots = [cache_get("metrics", w) for w in cache_get("metrics", "workers") or []]
+    return _merge_snapshots([snap for snap in snapshots if snap])
+
+
+# =================================================
+# İstek profili (opt-in) + en yavaş istekler
+# =================================================
+# PROFILE_TOKEN tanımlı değilse hiçbir hook/route kaydedilmez → sıfır ek yük.
+# Tanımlıysa:
+#   X-Profile-Token: <token> + X-Profile: cprofile | sample  → istek profillenir,
+#   sonuç önbelleğe yazılır, id'si X-Profile-Id başlığında döner.
+#   GET /debug/profiles/<id>  → pstats metni veya flamegraph için collapsed stack
+#   GET /debug/slow           → son PROFILE_SLOW_WINDOW sn'nin en yavaş N isteği
+# cProfile sadece istek thread'ini görür; "sample" tüm thread'leri örnekler
+# (fetch_rss havuzu dahil, aynı anda çalışan diğer istekler de görünebilir).
+PROFILE_SLOW_KEEP = int(os.environ.get("PROFILE_SLOW_KEEP", "20"))
+PROFILE_SLOW_WINDOW = float(os.environ.get("PROFILE_SLOW_WINDOW", "3600"))
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_TTL = 3600
+
+
+def _profile_authorized():
+    token = request.headers.get("X-Profile-Token", "")
+    return bool(token) and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+class StackSampler:
+    """sys._current_frames() ile tüm thread'leri örnekler → collapsed stack sayıları"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.counts = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self.stopped.wait(self.interval):
+            for t in threading.enumerate():
+                names[t.ident] = t.name
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                key = ";".join([names.get(ident, str(ident))] + stack[::-1])
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def collapsed(self):
+        return "\n".join(f"{k} {v}" for k, v in sorted(self.counts.items(), key=lambda kv: -kv[1]))
+
+
+def _stage_breakdown(stages):
+    """[(metrik, etiketler, süre)] → {"metrik{etiketler}": {"seconds", "count"}}"""
+    out = {}
+    for name, labels, value in stages:
+        key = name + _fmt_labels(labels)
+        row = out.setdefault(key, {"seconds": 0.0, "count": 0})
+        row["seconds"] += value
+        row["count"] += 1
+    return {k: {"seconds": round(v["seconds"], 4), "count": v["count"]} for k, v in out.items()}
+
+
+_slow_floor = 0.0
+
+
+def _record_slow_request(duration, stages):
+    """Süre ilk N'e giriyorsa paylaşılan yavaş istek listesine ekle"""
+    global _slow_floor
+    if duration <= _slow_floor:
+        return
+    now = time.time()
+    entry = {
+        "at": now,
+        "duration_ms": round(duration * 1000, 1),
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint,
+        "worker": _owner_id(),
+        "stages": _stage_breakdown(stages),
+    }
+    recent = [e for e in cache_get("debug", "slow") or [] if now - e["at"] < PROFILE_SLOW_WINDOW]
+    recent = sorted(recent + [entry], key=lambda e: -e["duration_ms"])[:PROFILE_SLOW_KEEP]
+    cache_set("debug", "slow", recent)
+    # Liste doluysa eşiğin altındakiler için önbelleğe hiç gitme
+    _slow_floor = recent[-1]["duration_ms"] / 1000 if len(recent) >= PROFILE_SLOW_KEEP else 0.0
+
+
+def _profile_before():
+    g.profile_stages_token = _request_stages.set([])
+    mode = (request.headers.get("X-Profile") or "").lower()
+    if mode not in ("cprofile", "sample") or not _profile_authorized():
+        return
+    if mode == "cprofile":
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+    else:
+        g.profiler = StackSampler(PROFILE_SAMPLE_INTERVAL)
+        g.profiler.start()
+
+
+def _profile_after(response):
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            buf = io.StringIO()
+            pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(60)
+            payload = {"format": "pstats", "body": buf.getvalue()}
+        else:
+            profiler.stop()
+            payload = {"format": "collapsed", "body": profiler.collapsed()}
+        profile_id = uuid.uuid4().hex[:12]
+        payload["path"] = request.full_path.rstrip("?")
+        cache_set("profile", profile_id, payload, PROFILE_TTL)
+        response.headers["X-Profile-Id"] = profile_id
+
+    stages = _request_stages.get()
+    token = getattr(g, "profile_stages_token", None)
+    if token is not None:
+        _request_stages.reset(token)
+    started = getattr(g, "request_started", None)
+    if started is not None and stages is not None:
+        _record_slow_request(time.perf_counter() - started, stages)
+    return response
+
+
+def _profile_teardown(exc):
+    # İstek hata ile bittiyse after_request çalışmaz → profilleyiciyi kapat
+    profiler = g.pop("profiler", None)
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    elif profiler is not None:
+        profiler.stop()
+
+
+def get_profile(profile_id):
+    if not _profile_authorized():
+        return jsonify({"error": "Yetkisiz"}), 403
+    payload = cache_get("profile", profile_id)
+    if not payload:
+        return jsonify({"error": "Profil bulunamadı"}), 404
+    return Response(payload["body"], mimetype="text/plain")
+
+
+def get_slow_requests():
+    if not _profile_authorized():
+        return jsonify({"error": "Yetkisiz"}), 403
+    return jsonify({"requests": cache_get("debug", "slow") or []})
+
+
+# =================================================
+# Önbellek altyapısı (süreç içi / süreçler arası)
+# =================================================
+# Feed, makale ve AI rewrite önbellekleri bu arayüzü kullanır. Değerler JSON
+# olarak saklanır. gunicorn birden fazla worker ile çalışıyorsa
+# CACHE_BACKEND=sqlite (aynı makinedeki worker'lar) veya CACHE_BACKEND=redis
+# (birden fazla instance) seçilmeli; "memory" her worker'a ayrı önbellek demek.
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+CACHE_PATH = os.environ.get("CACHE_PATH", "/tmp/rss-backend-cache.sqlite3")
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+ARTICLE_CACHE_TTL = int(os.environ.get("ARTICLE_CACHE_TTL", str(6 * 3600)))
+REWRITE_CACHE_TTL = int(os.environ.get("REWRITE_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+class MemoryCache:
+    """Süreç içi önbellek (tek worker / geliştirme)."""
+
+    shared = False
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+        self.logs = {}
+
+    def _live(self, key, now):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] < now:
+            del self.data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self.lock:
+            entry = self._live(key, time.time())
+            return entry[0] if entry else None
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            self.data[key] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def add(self, key, value, ttl=None):
+        """Anahtar yoksa yazar → True; varsa dokunmaz → False."""
+        with self.lock:
+            if self._live(key, time.time()):
+                return False
+            self.data[key] = (value, time.time() + ttl if ttl else None)
+            return True
+
+    def extend(self, key, value, ttl):
+        """Anahtar hâlâ value'ya aitse süresini uzatır."""
+        with self.lock:
+            entry = self._live(key, time.time())
+            if not entry or entry[0] != value:
+                return False
+            self.data[key] = (value, time.time() + ttl)
+            return True
+
+    def release(self, key, value):
+        """Anahtar hâlâ value'ya aitse siler (süresi dolup başkasına geçen kilide dokunmaz)."""
+        with self.lock:
+            entry = self._live(key, time.time())
+            if not entry or entry[0] != value:
+                return False
+            del self.data[key]
+            return True
+
+    def append(self, key, value, maxlen):
+        """Sadece eklenen kayda yazar; artan id döner (son maxlen kayıt tutulur)."""
+        with self.lock:
+            log = self.logs.setdefault(key, [])
+            entry_id = log[-1][0] + 1 if log else _log_seed_id()
+            log.append((entry_id, value))
+            del log[:-maxlen]
+            return entry_id
+
+    def read_after(self, key, after_id):
+        """after_id'den büyük id'li kayıtlar → [(id, value)], id sırasıyla"""
+        with self.lock:
+            return [entry for entry in self.logs.get(key, ()) if entry[0] > after_id]
+
+
+class SQLiteCache:
+    """Aynı makinedeki tüm worker'ların paylaştığı dosya tabanlı önbellek (WAL)."""
+
+    shared = True
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_log "
+            "(key TEXT NOT NULL, id INTEGER NOT NULL, value TEXT NOT NULL, PRIMARY KEY (key, id))"
+        )
+
+    def _conn(self):
+        # sqlite bağlantısı thread'ler ve fork arasında paylaşılmaz
+        conn = getattr(self.local, "conn", None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), time.time() + ttl if ttl else None),
+        )
+        if random.random() < 0.01:
+            conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def add(self, key, value, ttl=None):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM cache WHERE key = ? AND expires_at IS NOT NULL AND expires_at < ?", (key, now))
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + ttl if ttl else None),
+            )
+            conn.execute("COMMIT")
+            return cur.rowcount == 1
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def extend(self, key, value, ttl):
+        now = time.time()
+        cur = self._conn().execute(
+            "UPDATE cache SET expires_at = ? WHERE key = ? AND value = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (now + ttl, key, json.dumps(value, ensure_ascii=False), now),
+        )
+        return cur.rowcount == 1
+
+    def release(self, key, value):
+        cur = self._conn().execute(
+            "DELETE FROM cache WHERE key = ? AND value = ?", (key, json.dumps(value, ensure_ascii=False))
+        )
+        return cur.rowcount == 1
+
+    def append(self, key, value, maxlen):
+        # id yazma kilidi altında verilir → commit sırası = id sırası, okuyucu boşluk görmez
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT MAX(id) FROM cache_log WHERE key = ?", (key,)).fetchone()
+            entry_id = row[0] + 1 if row[0] is not None else _log_seed_id()
+            conn.execute(
+                "INSERT INTO cache_log (key, id, value) VALUES (?, ?, ?)",
+                (key, entry_id, json.dumps(value, ensure_ascii=False)),
+            )
+            conn.execute("DELETE FROM cache_log WHERE key = ? AND id <= ?", (key, entry_id - maxlen))
+            conn.execute("COMMIT")
+            return entry_id
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def read_after(self, key, after_id):
+        rows = self._conn().execute(
+            "SELECT id, value FROM cache_log WHERE key = ? AND id > ? ORDER BY id", (key, after_id)
+        ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+
+class RedisCache:
+    """Redis (veya Redis protokolü konuşan herhangi bir servis) üzerinde önbellek."""
+
+    shared = True
+    _EXTEND_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+    )
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+    )
+    # Sayaç artırma + ekleme tek adımda → id sırası ile görünme sırası aynı
+    _APPEND_SCRIPT = (
+        "redis.call('setnx', KEYS[2], ARGV[2]) "
+        "local id = string.format('%d', redis.call('incr', KEYS[2])) "
+        "redis.call('zadd', KEYS[1], id, id .. ':' .. ARGV[1]) "
+        "redis.call('zremrangebyrank', KEYS[1], 0, -tonumber(ARGV[3]) - 1) "
+        "return id"
+    )
+
+    def __init__(self, url):
+        import redis
+
+        self.r = redis.Redis.from_url(url)
+        self.r.ping()
+
+    def get(self, key):
+        raw = self.r.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.r.set(key, json.dumps(value, ensure_ascii=False), px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key):
+        self.r.delete(key)
+
+    def add(self, key, value, ttl=None):
+        return bool(self.r.set(key, json.dumps(value, ensure_ascii=False), nx=True, px=int(ttl * 1000) if ttl else None))
+
+    def extend(self, key, value, ttl):
+        return bool(self.r.eval(self._EXTEND_SCRIPT, 1, key, json.dumps(value, ensure_ascii=False), int(ttl * 1000)))
+
+    def release(self, key, value):
+        return bool(self.r.eval(self._RELEASE_SCRIPT, 1, key, json.dumps(value, ensure_ascii=False)))
+
+    def append(self, key, value, maxlen):
+        raw = json.dumps(value, ensure_ascii=False)
+        return int(self.r.eval(self._APPEND_SCRIPT, 2, f"{key}:log", f"{key}:seq", raw, _log_seed_id() - 1, maxlen))
+
+    def read_after(self, key, after_id):
+        out = []
+        for member in self.r.zrangebyscore(f"{key}:log", f"({int(after_id)}", "+inf"):
+            entry_id, _, raw = member.partition(b":")
+            out.append((int(entry_id), json.loads(raw)))
+        return out
+
+
+def _log_seed_id():
+    """
+    Boş kayıt akışının ilk id'si zaman tabanlı: önbellek silinse/yeniden kurulsa
+    da id'ler geri gitmez, istemcideki eski Last-Event-ID anlamlı kalır.
+    """
+    return int(time.time() * 1000) * 1000
+
+
+def _make_cache():
+    try:
+        if CACHE_BACKEND == "redis":
+            return RedisCache(REDIS_URL)
+        if CACHE_BACKEND == "sqlite":
+            return SQLiteCache(CACHE_PATH)
+    except Exception as e:
+        print(f"⚠️ {CACHE_BACKEND} önbelleği açılamadı, bellek içi önbellek kullanılacak:", e)
+    return MemoryCache()
+
+
+CACHE = _make_cache()
+
+
+def cache_get(namespace, key):
+    """Önbellekten oku; arka uç hatası → None (önbellek asla isteği düşürmez)"""
+    try:
+        value = CACHE.get(f"{namespace}:{key}")
+    except Exception as e:
+        print(f"Önbellek okunamadı ({namespace}):", e)
+        value = None
+    if namespace != "metrics":
+        inc("cache_requests_total", cache=namespace, result="miss" if value is None else "hit")
+    return value
+
+
+def cache_set(namespace, key, value, ttl=None):
+    try:
+        CACHE.set(f"{namespace}:{key}", value, ttl)
+    except Exception as e:
+        print(f"Önbelleğe yazılamadı ({namespace}):", e)
+
+
+def _owner_id():
+    """Kilit sahibi kimliği (fork sonrası pid değişir → her çağrıda hesapla)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+LEADER_TTL = float(os.environ.get("LEADER_TTL", "30"))
+
+
+def is_leader(name):
+    """Süre sınırlı liderlik kilidi: sahibi isek uzat, boştaysa al."""
+    key = f"leader:{name}"
+    me = _owner_id()
+    try:
+        return CACHE.extend(key, me, LEADER_TTL) or CACHE.add(key, me, LEADER_TTL)
+    except Exception as e:
+        print("Liderlik kilidi hatası:", e)
+        return False
+
+
+# =================================================
+# Parse havuzu (CPU-bound HTML / RSS ayrıştırma)
+# =================================================
+# BeautifulSoup ve feedparser saf Python; gunicorn worker'ında GIL'i tutup
+# diğer istekleri bekletiyor. PARSE_WORKERS > 0 ise ayrıştırma ayrı süreçlerde
+# yapılır: içeri ham byte/metin gider, dışarı düz dict/list döner.
+# PARSE_WORKERS=0 (varsayılan) → eski davranış, aynı thread'de ayrıştır.
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", "0"))
+PARSE_TIMEOUT = float(os.environ.get("PARSE_TIMEOUT", "30"))
+# Çok thread'li bir süreçten fork etmek güvenli değil → varsayılan forkserver
+PARSE_START_METHOD = os.environ.get("PARSE_START_METHOD", "forkserver")
+
+_parse_pool = None
+_parse_pool_pid = None
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool():
+    """Süreç başına tek ProcessPoolExecutor (gunicorn fork'undan sonra yeniden kurulur)."""
+    global _parse_pool, _parse_pool_pid
+    if PARSE_WORKERS <= 0:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None or _parse_pool_pid != os.getpid():
+            _parse_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context(PARSE_START_METHOD),
+            )
+            _parse_pool_pid = os.getpid()
+        return _parse_pool
+
+
+def _reset_parse_pool(broken):
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is broken:
+            _parse_pool = None
+    try:
+        broken.shutdown(wait=False, cancel_futures=True)
+    except Exception:
+        pass
+
+
+def _pool_call(fn, args):
+    """Havuz sürecinde çalışır: sonuç + bu çağrıda toplanan metrikler"""
+    _metric_sink.records = []
+    try:
+        return fn(*args), _metric_sink.records
+    finally:
+        _metric_sink.records = None
+
+
+def run_parse(fn, *args):
+    """
+    fn(*args)'ı parse havuzunda çalıştırır, havuz kapalıysa doğrudan çağırır.
+    fn modül seviyesinde olmalı; argümanlar ve sonuç pickle'lanabilir olmalı.
+    """
+    pool = _get_parse_pool()
+    if pool is None:
+        return fn(*args)
+    try:
+        result, records = pool.submit(_pool_call, fn, args).result(timeout=PARSE_TIMEOUT)
+        _replay_metrics(records)
+        return result
+    except BrokenProcessPool:
+        # Bir worker öldüyse havuzu yenile, bu işi yerinde bitir
+        print("⚠️ Parse havuzu çöktü, yeniden kurulacak")
+        _reset_parse_pool(pool)
+        return fn(*args)
+
+# =================================================
+# Kaynak sağlığı (circuit breaker + uyarlanabilir timeout)
+# =================================================
+# Her host için gecikme EWMA'sı, hata oranı ve closed/open/half-open devre
+# tutulur. Devre açıkken o hosta istek atılmaz (hızlı hata), cooldown sonrası
+# tek bir deneme isteği (half-open) geçer. Timeout, hostun gözlenen
+# gecikmesine göre HTTP_TIMEOUT_MIN..HTTP_TIMEOUT_MAX arasında ayarlanır.
+HTTP_TIMEOUT_MIN = float(os.environ.get("HTTP_TIMEOUT_MIN", "2"))
+HTTP_TIMEOUT_MAX = float(os.environ.get("HTTP_TIMEOUT_MAX", "12"))
+HTTP_TIMEOUT_FACTOR = float(os.environ.get("HTTP_TIMEOUT_FACTOR", "4"))
+HEALTH_EWMA_ALPHA = 0.2
+BREAKER_FAILURES = int(os.environ.get("BREAKER_FAILURES", "3"))          # art arda hata
+BREAKER_ERROR_RATE = float(os.environ.get("BREAKER_ERROR_RATE", "0.5"))  # EWMA hata oranı
+BREAKER_MIN_SAMPLES = 10
+BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", "30"))
+BREAKER_COOLDOWN_MAX = float(os.environ.get("BREAKER_COOLDOWN_MAX", "300"))
+
+
+class SourceUnavailable(Exception):
+    """Devre açık → kaynağa istek atılmadan hızlı hata."""
+
+
+class SourceHealth:
+    def __init__(self, host):
+        self.host = host
+        self.lock = threading.Lock()
+        self.latency_ewma = None
+        self.error_rate = 0.0
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.cooldown = BREAKER_COOLDOWN
+        self.probe_in_flight = False
+        self.last_error = None
+
+    def timeout(self):
+        """Gözlenen gecikmeye göre timeout (henüz ölçüm yoksa üst sınır)."""
+        if self.latency_ewma is None:
+            return HTTP_TIMEOUT_MAX
+        t = self.latency_ewma * HTTP_TIMEOUT_FACTOR + 1.0
+        return max(HTTP_TIMEOUT_MIN, min(HTTP_TIMEOUT_MAX, t))
+
+    def allow(self):
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self.state = "half_open"
+                self.probe_in_flight = False
+            # half-open → aynı anda sadece tek deneme isteği
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+            return True
+
+    def record_success(self, elapsed):
+        with self.lock:
+            a = HEALTH_EWMA_ALPHA
+            self.latency_ewma = elapsed if self.latency_ewma is None else (1 - a) * self.latency_ewma + a * elapsed
+            self.error_rate = (1 - a) * self.error_rate
+            self.samples += 1
+            self.consecutive_failures = 0
+            if self.state != "closed":
+                print(f"✅ {self.host} tekrar erişilebilir, devre kapandı")
+            self.state = "closed"
+            self.cooldown = BREAKER_COOLDOWN
+            self.probe_in_flight = False
+
+    def record_failure(self, err):
+        with self.lock:
+            a = HEALTH_EWMA_ALPHA
+            self.error_rate = (1 - a) * self.error_rate + a
+            self.samples += 1
+            self.consecutive_failures += 1
+            self.last_error = f"{type(err).__name__}: {err}"
+            if self.state == "half_open":
+                # Deneme de başarısız → daha uzun süre kapalı tut
+                self.cooldown = min(self.cooldown * 2, BREAKER_COOLDOWN_MAX)
+                self._open()
+            elif self.state == "closed" and (
+                self.consecutive_failures >= BREAKER_FAILURES
+                or (self.samples >= BREAKER_MIN_SAMPLES and self.error_rate >= BREAKER_ERROR_RATE)
+            ):
+                self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.probe_in_flight = False
+        print(f"⛔ {self.host} devre açıldı ({self.cooldown:.0f} sn): {self.last_error}")
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "host": self.host,
+                "state": self.state,
+                "latency_ewma_ms": round(self.latency_ewma * 1000) if self.latency_ewma is not None else None,
+                "error_rate": round(self.error_rate, 3),
+                "consecutive_failures": self.consecutive_failures,
+                "timeout_s": round(self.timeout(), 2),
+                "last_error": self.last_error,
+            }
+
+
+_SOURCE_HEALTH = {}
+_SOURCE_HEALTH_LOCK = threading.Lock()
+
+
+def source_health(url):
+    host = urlparse(url).netloc.lower()
+    with _SOURCE_HEALTH_LOCK:
+        h = _SOURCE_HEALTH.get(host)
+        if h is None:
+            h = _SOURCE_HEALTH[host] = SourceHealth(host)
+        return h
+
+
+# İndirme üst sınırları (açılmış/decompress edilmiş bayt). Gövde parça parça
+# okunur; sınırda bağlantı kapatılır, bellek ve aktarım istek başına sınırlı.
+FEED_MAX_BYTES = int(os.environ.get("FEED_MAX_BYTES", str(5 * 1024 * 1024)))
+ARTICLE_MAX_BYTES = int(os.environ.get("ARTICLE_MAX_BYTES", str(3 * 1024 * 1024)))
+HEAD_MAX_BYTES = int(os.environ.get("HEAD_MAX_BYTES", str(512 * 1024)))
+_READ_CHUNK = 16 * 1024
+
+
+def _read_limited(resp, max_bytes, until, deadline):
+    """
+    stream=True yanıtın gövdesi → (bayt, truncated).
+    max_bytes'a ulaşınca (truncated=True) ya da until (ör. b"</head>",
+    büyük/küçük harf duyarsız) görülünce okumayı bırakır.
+    """
+    chunks = []
+    size = 0
+    truncated = False
+    tail = b""
+    complete = False
+    try:
+        for chunk in resp.iter_content(_READ_CHUNK):
+            if until is not None:
+                window = tail + chunk.lower()
+                pos = window.find(until)
+                if pos != -1:
+                    chunks.append(chunk[: pos + len(until) - len(tail)])
+                    break
+                tail = window[-(len(until) - 1):]
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                truncated = True
+                break
+            if time.monotonic() > deadline:
+                raise requests.Timeout("gövde okuma süresi aşıldı")
+        else:
+            complete = True
+    finally:
+        # Sonuna kadar okunan bağlantı havuza döner; yarıda kesilen kapatılır
+        if not complete:
+            resp.close()
+    return b"".join(chunks)[:max_bytes], truncated
+
+
+def guarded_get(url, kind="page", max_bytes=None, until=None, **kwargs):
+    """
+    requests.get + circuit breaker + host'a göre timeout.
+    Ağ hataları ve 5xx hostu sağlıksız sayar; 4xx sayfa hatasıdır, host sağlıklı.
+    kind: metrik etiketi (feed / og_image / article)
+    max_bytes verilirse gövde akışla ve en fazla bu kadar okunur (until'de
+    erken durur); resp.content / resp.text okunan kısmı döner,
+    resp.truncated sınıra takılıp takılmadığını söyler.
+    """
+    health = source_health(url)
+    if not health.allow():
+        inc("upstream_skipped_total", host=health.host, kind=kind)
+        raise SourceUnavailable(f"{health.host} geçici olarak devre dışı")
+    t0 = time.monotonic()
+    timeout = health.timeout()
+    try:
+        resp = requests.get(url, timeout=timeout, stream=bool(max_bytes), **kwargs)
+        resp.truncated = False
+        if max_bytes:
+            if resp.status_code >= 400:
+                resp.close()  # hata sayfasının gövdesi gerekmiyor
+            else:
+                body, resp.truncated = _read_limited(resp, max_bytes, until, t0 + timeout * 2)
+                # .content / .text normal yanıttaki gibi çalışsın
+                resp._content = body
+                inc("upstream_bytes_total", len(body), kind=kind)
+                if resp.truncated:
+                    inc("upstream_truncated_total", host=health.host, kind=kind)
+    except requests.RequestException as e:
+        health.record_failure(e)
+        observe("upstream_fetch_seconds", time.monotonic() - t0, host=health.host, kind=kind)
+        inc("upstream_errors_total", host=health.host, kind=kind)
+        raise
+    elapsed = time.monotonic() - t0
+    observe("upstream_fetch_seconds", elapsed, host=health.host, kind=kind)
+    if resp.status_code >= 500:
+        health.record_failure(requests.HTTPError(f"HTTP {resp.status_code}"))
+        inc("upstream_errors_total", host=health.host, kind=kind)
+    else:
+        health.record_success(elapsed)
+    resp.raise_for_status()
+    return resp
+
 # =================================================
 # RSS Kategorileri
 # =================================================
@@ -440,93 +1588,792 @@ def parse_date(entry):
         dt = datetime.now(timezone.utc)
     return dt.astimezone(LOCAL_TZ)
 
-def extract_image_from_entry(entry):
-    """RSS içinden görseli almaya çalışır, bulunamazsa sayfa içinden çeker."""
+class _DescScanner(HTMLParser):
+    """
+    Açıklama HTML'ini tek geçişte tarar: düz metin parçaları + ilk <img> src.
+    BeautifulSoup(html, "html.parser").get_text() ile aynı metni üretir
+    (entity'ler çözülür, script/style/template ve yorumlar atlanır, CDATA dahil;
+    pre/textarea dışında sadece boşluktan oluşan metin tek " " ya da "\n" olur).
+    """
+
+    _SKIP_TAGS = ("script", "style", "template")
+    _PRESERVE_WS_TAGS = ("pre", "textarea")
+    # bs4'ün kapanış beklemediği (yığına girmeyen) etiketler
+    _VOID_TAGS = frozenset(
+        "area base br col embed hr img input keygen link menuitem meta param source track wbr "
+        "basefont bgsound command frame image isindex nextid spacer".split()
+    )
+    _ASCII_SPACES = " \n\t\x0c\r"
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.first_img_src = None
+        self._seen_img = False
+        # bs4 html.parser gibi naif açık etiket yığını: </x> en yakın açık x'e kadar kapatır
+        self._open = []
+        self._skip_depth = 0
+        self._preserve_depth = 0
+        self._pending = []
+
+    def flush_data(self, include=None):
+        # bs4 gibi: iki etiket/yorum arasındaki metin tek parça olarak değerlendirilir
+        if not self._pending:
+            return
+        data = "".join(self._pending)
+        self._pending = []
+        if not self._preserve_depth and not data.strip(self._ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        if include is None:
+            include = not self._skip_depth
+        if include:
+            self.parts.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        self.flush_data()
+        if tag == "img" and not self._seen_img:
+            # soup.find("img") gibi: sadece ilk <img>'e bakılır
+            self._seen_img = True
+            self.first_img_src = dict(attrs).get("src") or None
+        if tag in self._VOID_TAGS:
+            return
+        self._open.append(tag)
+        if tag in self._SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self._PRESERVE_WS_TAGS:
+            self._preserve_depth += 1
+
+    def handle_endtag(self, tag):
+        self.flush_data()
+        if tag not in self._open:
+            return
+        while True:
+            top = self._open.pop()
+            if top in self._SKIP_TAGS:
+                self._skip_depth -= 1
+            elif top in self._PRESERVE_WS_TAGS:
+                self._preserve_depth -= 1
+            if top == tag:
+                break
+
+    def handle_data(self, data):
+        self._pending.append(data)
+
+    def handle_comment(self, data):
+        self.flush_data()
+
+    def handle_decl(self, decl):
+        self.flush_data()
+
+    def handle_pi(self, data):
+        self.flush_data()
+
+    def unknown_decl(self, data):
+        self.flush_data()
+        if data.upper().startswith("CDATA["):
+            # bs4 CDATA'yı script/template içinde de metne katar
+            self._pending.append(data[len("CDATA["):])
+            self.flush_data(include=True)
+
+
+def html_to_text_and_image(html):
+    """HTML parçasından (düz metin, ilk <img> src) döndürür; soup kurmadan tek geçiş."""
+    if not html:
+        return "", None
+    scanner = _DescScanner()
     try:
-        # 1) Enclosure
-        if hasattr(entry, "enclosures") and entry.enclosures:
-            for enc in entry.enclosures:
-                if enc.get("href"):
-                    return enc["href"]
-
-        # 2) Media:content
-        if hasattr(entry, "media_content") and entry.media_content:
-            for mc in entry.media_content:
-                if mc.get("url"):
-                    return mc["url"]
-
-        # 3) Media:thumbnail
-        if hasattr(entry, "media_thumbnail") and entry.media_thumbnail:
-            for mt in entry.media_thumbnail:
-                if mt.get("url"):
-                    return mt["url"]
+        scanner.feed(html)
+        scanner.close()
+    except Exception:
+        # Bozuk HTML → o ana kadar okunanlarla yetin
+        pass
+    scanner.flush_data()
+    return "".join(scanner.parts), scanner.first_img_src
+
+
+def _image_from_entry_media(entry):
+    """Enclosure / media:content / media:thumbnail alanlarından görsel."""
+    # 1) Enclosure
+    if hasattr(entry, "enclosures") and entry.enclosures:
+        for enc in entry.enclosures:
+            if enc.get("href"):
+                return enc["href"]
+
+    # 2) Media:content
+    if hasattr(entry, "media_content") and entry.media_content:
+        for mc in entry.media_content:
+            if mc.get("url"):
+                return mc["url"]
+
+    # 3) Media:thumbnail
+    if hasattr(entry, "media_thumbnail") and entry.media_thumbnail:
+        for mt in entry.media_thumbnail:
+            if mt.get("url"):
+                return mt["url"]
+    return None
+
+
+def _image_from_entry_content(entry):
+    """Content içindeki ilk <img>."""
+    if hasattr(entry, "content") and entry.content:
+        for c in entry.content:
+            if "value" in c:
+                _, src = html_to_text_and_image(c["value"])
+                if src:
+                    return src
+    return None
+
+
+def _image_from_entry_markup(entry):
+    """RSS kaydının kendi alanlarından (enclosure, media, <img>) görsel bulur."""
+    try:
+        img = _image_from_entry_media(entry)
+        if img:
+            return img
 
         # 4) Summary içindeki <img>
         if hasattr(entry, "summary") and entry.summary:
-            soup = BeautifulSoup(entry.summary, "html.parser")
-            img = soup.find("img")
-            if img and img.get("src"):
-                return img["src"]
+            _, src = html_to_text_and_image(entry.summary)
+            if src:
+                return src
 
         # 5) Content içindeki <img>
-        if hasattr(entry, "content") and entry.content:
-            for c in entry.content:
-                if "value" in c:
-                    soup = BeautifulSoup(c["value"], "html.parser")
-                    img = soup.find("img")
-                    if img and img.get("src"):
-                        return img["src"]
-
+        return _image_from_entry_content(entry)
     except Exception:
-        pass
+        return None
 
-    # 6) Fallback → RSS’te yoksa sayfa HTML’den og:image çek
+
+def _parse_og_image(html):
+    """Sayfa HTML'inden og:image değerini döndürür (parse havuzunda çalışabilir)."""
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    og_image = soup.find("meta", property="og:image")
+    if og_image and og_image.get("content"):
+        return og_image["content"]
+    return None
+
+
+def _og_image_from_url(link):
+    """RSS'te görsel yoksa sayfayı indirip og:image çeker."""
     try:
-        link = entry.get("link")
-        if link:
-            resp = requests.get(link, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-            soup = BeautifulSoup(resp.text, "html.parser")
-            og_image = soup.find("meta", property="og:image")
-            if og_image and og_image.get("content"):
-                return og_image["content"]
+        inc("image_fallback_total", host=urlparse(link).netloc.lower())
+        # og:image <head> içinde → gövdenin geri kalanını indirme
+        resp = guarded_get(
+            link, kind="og_image", max_bytes=HEAD_MAX_BYTES, until=b"</head>", headers={"User-Agent": "Mozilla/5.0"}
+        )
+        return run_parse(_parse_og_image, resp.text)
     except Exception:
-        pass
+        return None
 
-    return None
 
+def extract_image_from_entry(entry):
+    """RSS içinden görseli almaya çalışır, bulunamazsa sayfa içinden çeker."""
+    img = _image_from_entry_markup(entry)
+    if img:
+        return img
+
+    # 6) Fallback → RSS’te yoksa sayfa HTML’den og:image çek
+    link = entry.get("link")
+    if link:
+        return _og_image_from_url(link)
+    return None
 
 
-def fetch_single(source, info):
-    """Tek kaynaktan haberleri getir"""
+def _parse_feed_payload(raw, source, info):
+    """
+    Ham RSS/Atom byte'larını haber dict'lerine çevirir.
+    Ağ erişimi yapmaz; görseli RSS'te olmayan kayıtlar "image": None döner.
+    """
+    with timed("feed_parse_seconds", source=source):
+        feed = feedparser.parse(raw)
     items = []
+    for entry in feed.entries:
+        pub_dt = parse_date(entry)
+        raw_desc_html = entry.get("description") or entry.get("summary", "")
+        # Tek geçiş: hem düz metin hem de summary içindeki ilk <img>
+        plain_desc, desc_img = html_to_text_and_image(raw_desc_html)
+        try:
+            image = _image_from_entry_media(entry) or desc_img or _image_from_entry_content(entry)
+        except Exception:
+            image = None
+
+        items.append(
+            {
+                "source": source,
+                "source_logo": info.get("logo"),
+                "source_color": info.get("color"),
+                "title": entry.get("title", "Başlık Yok"),
+                "link": entry.get("link", ""),
+                "pubDate": entry.get("published", "") or entry.get("updated", ""),
+                "published_at": pub_dt.isoformat(),
+                "published_at_ms": int(pub_dt.timestamp() * 1000),
+                "description": plain_desc.strip(),
+                "image": image,
+            }
+        )
+    return items
+
+
+# =================================================
+# Feed durumu + uyarlanabilir yoklama aralığı
+# =================================================
+# Her feed URL'si için: ETag/Last-Modified, son başarılı içerik, görülen
+# haber anahtarları ve öğrenilmiş yoklama aralığı tutulur. Aralık, kayıtların
+# yayın zamanları arasındaki medyan boşluktan öğrenilir; değişmeyen (304 /
+# yeni haber yok) yoklamalarda POLL_BACKOFF ile uzar. Aralık dolmadan gelen
+# istekler upstream'e gitmeden son içerikle cevaplanır.
+POLL_MIN_SECONDS = float(os.environ.get("POLL_MIN_SECONDS", "60"))
+POLL_MAX_SECONDS = float(os.environ.get("POLL_MAX_SECONDS", "1800"))
+POLL_BACKOFF = float(os.environ.get("POLL_BACKOFF", "1.5"))
+POLL_SCHEDULER = os.environ.get("POLL_SCHEDULER", "0") == "1"
+FEED_SEEN_MAX = 500
+
+# Yoklayıcı açıkken istek yolu, vadesi bu kadar geçmiş feed'i bile önbellekten
+# sunar: yenilemeyi lider worker yapar, diğerleri sadece okur.
+POLL_GRACE_SECONDS = float(os.environ.get("POLL_GRACE_SECONDS", "120"))
+
+_FEED_STATE_LOCK = threading.Lock()
+_FEED_REFRESH_LOCKS = {}
+
+
+def get_feed_state(url):
+    """Feed durumunun kopyası (değiştirip put_feed_state ile geri yazılır)."""
+    state = cache_get("feed", url)
+    if state is None:
+        state = _restore_feed_state(url)
+    return dict(state or {})
+
+
+def put_feed_state(url, state):
+    cache_set("feed", url, state)
+
+
+def _feed_refresh_lock(url):
+    with _FEED_STATE_LOCK:
+        return _FEED_REFRESH_LOCKS.setdefault(url, threading.Lock())
+
+
+def _feed_is_fresh(state, now):
+    return bool(state.get("fetched")) and now < state.get("next_poll", 0)
+
+
+def _feed_is_servable(state, now):
+    """İstek yolunda upstream'e gitmeden sunulabilir mi?"""
+    if POLL_SCHEDULER and state.get("fetched"):
+        return now < state.get("next_poll", 0) + POLL_GRACE_SECONDS
+    return _feed_is_fresh(state, now)
+
+
+REFRESH_LOCK_TTL = HTTP_TIMEOUT_MAX * 3
+
+
+def _wait_for_peer_refresh(url, state):
+    """
+    Başka worker bu feed'i yeniliyor. Elde son bilinen içerik varsa beklemeden
+    onu döndür (takılan yayıncı bizi de bekletmesin). Hiç içerik yoksa peer'in
+    sonucunu bekle; peer başarısız olsa da refresh kilidini bırakır → kilit
+    kalkınca hemen dön.
+    """
+    if state.get("fetched"):
+        return state
+    last_poll = state.get("last_poll")
+    deadline = time.time() + HTTP_TIMEOUT_MAX * 2
+    while time.time() < deadline:
+        time.sleep(0.2)
+        # Önce kilit, sonra durum: peer durumu yazıp kilidi bırakır
+        try:
+            peer_done = CACHE.get(f"refresh:{url}") is None
+        except Exception:
+            peer_done = True
+        state = get_feed_state(url)
+        if peer_done or state.get("last_poll") != last_poll:
+            return state
+    return get_feed_state(url)
+
+
+def _item_key(it):
+    return it.get("link") or it.get("title") or ""
+
+
+def _items_for(state, source, info):
+    """Önbellekteki haberlerin kopyası; kaynak adı/logo/renk çağırana göre."""
+    return [
+        dict(it, source=source, source_logo=info.get("logo"), source_color=info.get("color"))
+        for it in state.get("items", [])
+    ]
+
+
+def _schedule_next_poll(state, items, new_count, now):
+    """Yayın sıklığına göre bir sonraki yoklama zamanını belirler."""
+    interval = state.get("interval") or POLL_MIN_SECONDS
+    if new_count:
+        stamps = sorted((it["published_at_ms"] / 1000.0 for it in items), reverse=True)[:10]
+        gaps = [a - b for a, b in zip(stamps, stamps[1:]) if a - b >= 1]
+        # Ortalama yayın aralığında iki kez yokla; zaman bilgisi yoksa hızlan
+        interval = statistics.median(gaps) / 2 if gaps else interval / POLL_BACKOFF
+        state["last_change"] = now
+    else:
+        interval = interval * POLL_BACKOFF
+    interval = max(POLL_MIN_SECONDS, min(POLL_MAX_SECONDS, interval))
+    state["interval"] = interval
+    # Tüm feed'ler aynı anda vurmasın diye ±%10 sapma
+    state["next_poll"] = now + interval * random.uniform(0.9, 1.1)
+
+
+def fetch_single(source, info, force=False):
+    """Tek kaynaktan haberleri getir (aralık dolmadıysa önbellekten)"""
+    url = info["url"]
+    state = get_feed_state(url)
+    if not force and _feed_is_servable(state, time.time()):
+        return _items_for(state, source, info)
+
+    # Aynı feed'i aynı anda yenileyen tek thread olsun. Elde son bilinen içerik
+    # varsa diğerleri yenilemeyi (koşullu GET + og:image'lar) beklemeden onu alır;
+    # hiç içerik yoksa yenileyicinin sonucunu bekler
+    lock = _feed_refresh_lock(url)
+    if not lock.acquire(blocking=not state.get("fetched")):
+        return _items_for(state, source, info)
     try:
-        resp = requests.get(info["url"], timeout=12, headers=HTTP_HEADERS)
-        resp.raise_for_status()
-        feed = feedparser.parse(resp.content)
+        state = get_feed_state(url)
+        now = time.time()
+        if not force and _feed_is_servable(state, now):
+            return _items_for(state, source, info)
+        # Açılışta diskten gelen içerik beklemeden sunulur, yenileme arka planda
+        if not force and state.get("restored"):
+            run_in_background(f"feed:{url}", fetch_single, source, info, True)
+            return _items_for(state, source, info)
 
-        for entry in feed.entries:
-            img_url = extract_image_from_entry(entry)
-            pub_dt = parse_date(entry)
-            raw_desc_html = entry.get("description") or entry.get("summary", "")
-            plain_desc = BeautifulSoup(raw_desc_html, "html.parser").get_text() if raw_desc_html else ""
+        # Worker'lar arası: önbellek paylaşımlıysa aynı anda tek yenileyici.
+        # Kilit değeri bu yenilemeye özel → süresi dolup başkasına geçmişse silinmez
+        refresh_key = f"refresh:{url}"
+        refresh_token = f"{_owner_id()}:{uuid.uuid4().hex[:8]}"
+        if CACHE.shared and not CACHE.add(refresh_key, refresh_token, REFRESH_LOCK_TTL):
+            state = _wait_for_peer_refresh(url, state)
+            return _items_for(state, source, info)
 
-            items.append(
-                {
-                    "source": source,
-                    "source_logo": info.get("logo"),
-                    "source_color": info.get("color"),
-                    "title": entry.get("title", "Başlık Yok"),
-                    "link": entry.get("link", ""),
-                    "pubDate": entry.get("published", "") or entry.get("updated", ""),
-                    "published_at": pub_dt.isoformat(),
-                    "published_at_ms": int(pub_dt.timestamp() * 1000),
-                    "description": plain_desc.strip(),
-                    "image": img_url,
-                }
-            )
-    except Exception as e:
-        print(f"{info['url']} okunamadı:", e)
-    return items
+        try:
+            headers = dict(HTTP_HEADERS)
+            if state.get("etag"):
+                headers["If-None-Match"] = state["etag"]
+            if state.get("last_modified"):
+                headers["If-Modified-Since"] = state["last_modified"]
+            resp = guarded_get(url, kind="feed", max_bytes=FEED_MAX_BYTES, headers=headers)
+            state["polls"] = state.get("polls", 0) + 1
+            if resp.truncated:
+                # Yarım XML'i parse etme; son başarılı içerik sunulmaya devam eder
+                raise ValueError(f"feed {FEED_MAX_BYTES} bayt sınırını aşıyor")
+
+            if resp.status_code == 304 and state.get("fetched"):
+                state["not_modified"] = state.get("not_modified", 0) + 1
+                items = state.get("items", [])
+                new_items = []
+            else:
+                items = run_parse(_parse_feed_payload, resp.content, source, info)
+                previous = {it["link"]: it for it in state.get("items", []) if it.get("link")}
+                seen = set(state.get("seen", []))
+                new_items = [it for it in items if _item_key(it) not in seen]
+
+                # RSS'te görseli olmayanlar için sayfadan og:image (I/O → bu thread'de);
+                # önceki yoklamada bulunmuşsa tekrar indirme
+                for it in items:
+                    if not it["image"] and it["link"]:
+                        prev = previous.get(it["link"])
+                        if prev and prev.get("image"):
+                            it["image"] = prev["image"]
+                        else:
+                            # Sayfa başına bir HTTP isteği → uzun sürebilir, kilit düşmesin
+                            if CACHE.shared:
+                                CACHE.extend(refresh_key, refresh_token, REFRESH_LOCK_TTL)
+                            it["image"] = _og_image_from_url(it["link"])
+
+                state["etag"] = resp.headers.get("ETag")
+                state["last_modified"] = resp.headers.get("Last-Modified")
+                state["items"] = items
+                state["seen"] = ([_item_key(it) for it in new_items] + state.get("seen", []))[:FEED_SEEN_MAX]
+
+            # İlk yoklamada her şey "yeni" görünür → sadece sonraki yoklamaları yayınla
+            if new_items and state.get("fetched"):
+                NEWS_BUS.publish(url, source, new_items)
+
+            _schedule_next_poll(state, items, len(new_items), now)
+            state.pop("restored", None)
+            state["fetched"] = True
+            state["last_poll"] = now
+            put_feed_state(url, state)
+        except Exception as e:
+            print(f"{url} okunamadı:", e)
+        finally:
+            if CACHE.shared:
+                CACHE.release(refresh_key, refresh_token)
+        # Hata durumunda da son başarılı içerik döner
+        return _items_for(state, source, info)
+    finally:
+        lock.release()
+
+
+def feed_sources():
+    """Tüm kategorilerdeki benzersiz feed'ler → {url: (source, info)}"""
+    out = {}
+    for sources in RSS_CATEGORIES.values():
+        for source, info in sources.items():
+            out.setdefault(info["url"], (source, info))
+    return out
+
+
+_poll_thread = None
+_poll_thread_lock = threading.Lock()
+
+
+STREAM_SYNC_SECONDS = float(os.environ.get("STREAM_SYNC_SECONDS", "2"))
+
+
+def _poll_loop():
+    """
+    Arka planda sadece vadesi gelen feed'leri yoklar.
+    Her worker'da çalışır ama yoklamayı sadece lider yapar; lider dahil tüm
+    worker'lar paylaşılan akıştan yeni haber olaylarını senkronlar (istek
+    yolundaki yenilemeler herhangi bir worker'da yayın yapabilir).
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        while True:
+            try:
+                NEWS_BUS.sync_from_cache()
+                if not is_leader("feed-poller"):
+                    time.sleep(STREAM_SYNC_SECONDS)
+                    continue
+
+                now = time.time()
+                feeds = feed_sources()
+                due = [si for url, si in feeds.items() if not _feed_is_fresh(get_feed_state(url), now)]
+                # Vadesi gelen feed POLL_GRACE_SECONDS boyunca hâlâ "sunulabilir" sayılır;
+                # o esneklik istek yolu için, yoklayıcı her zaman kaynağa gitmeli
+                list(executor.map(lambda si: fetch_single(*si, force=True), due))
+                maybe_write_snapshot()
+                next_due = min(
+                    (get_feed_state(url).get("next_poll", now) for url in feeds),
+                    default=now + POLL_MIN_SECONDS,
+                )
+                # Liderlik kilidi LEADER_TTL dolmadan yenilenmeli; olay senkronu da gecikmesin
+                time.sleep(max(1.0, min(LEADER_TTL / 3, STREAM_SYNC_SECONDS, next_due - time.time())))
+            except Exception as e:
+                print("❌ Yoklama döngüsü hatası:", e)
+                time.sleep(5)
+
+
+def start_poll_scheduler():
+    """Yoklama thread'ini (süreç başına bir kez) başlatır."""
+    global _poll_thread
+    with _poll_thread_lock:
+        if _poll_thread is not None and _poll_thread.is_alive():
+            return
+        _poll_thread = threading.Thread(target=_poll_loop, name="feed-poller", daemon=True)
+        _poll_thread.start()
+        print("⏱️ Feed yoklayıcı başlatıldı")
+
+
+# =================================================
+# Feed anlık görüntüsü (hızlı yeniden başlatma)
+# =================================================
+# Feed durumları (haberler, ETag/Last-Modified, görülen anahtarlar, yoklama
+# aralığı) periyodik olarak tek bir dosyaya yazılır:
+#   başlık | zlib(json index: url → [offset, uzunluk]) | zlib(json durum) ...
+# Açılışta dosya mmap ile açılıp sadece index okunur; bir feed'in bloğu ilk
+# istendiğinde açılır. Geri yüklenen içerik hemen sunulur, feed arka planda
+# koşullu GET ile yenilenir. Kategori listeleri bu durumlardan birkaç ms'de
+# yeniden kurulduğu için ayrıca saklanmaz.
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", "/tmp/rss-backend-feeds.snapshot")
+SNAPSHOT_SECONDS = float(os.environ.get("SNAPSHOT_SECONDS", "60"))
+SNAPSHOT_MAX_AGE = float(os.environ.get("SNAPSHOT_MAX_AGE", str(6 * 3600)))
+SNAPSHOT_MAGIC = b"RSSNAP01"
+_SNAPSHOT_HEADER = struct.Struct("<8sdI")  # magic, oluşturulma zamanı, index uzunluğu
+
+
+class FeedSnapshot:
+    """Diskteki anlık görüntü (salt okunur, mmap)."""
+
+    def __init__(self, mm, created_at, index, data_start):
+        self.mm = mm
+        self.created_at = created_at
+        self.index = index
+        self.data_start = data_start
+
+    @classmethod
+    def open(cls, path):
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # dosya yok / boş
+            return None
+        try:
+            magic, created_at, index_len = _SNAPSHOT_HEADER.unpack_from(mm, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError("tanınmayan biçim")
+            start = _SNAPSHOT_HEADER.size
+            index = json.loads(zlib.decompress(mm[start:start + index_len]))
+        except (struct.error, ValueError, zlib.error) as e:
+            print("⚠️ Feed anlık görüntüsü okunamadı:", e)
+            mm.close()
+            return None
+        return cls(mm, created_at, index, start + index_len)
+
+    def get(self, url):
+        loc = self.index.get(url)
+        if not loc:
+            return None
+        offset, length = loc
+        start = self.data_start + offset
+        try:
+            return json.loads(zlib.decompress(self.mm[start:start + length]))
+        except (ValueError, zlib.error):
+            return None
+
+
+def write_feed_snapshot(path, states):
+    """{url: durum} → path (geçici dosyaya yazıp atomik rename)"""
+    index = {}
+    blobs = []
+    offset = 0
+    for url, state in states.items():
+        blob = zlib.compress(json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        index[url] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+    index_blob = zlib.compress(json.dumps(index, separators=(",", ":")).encode("utf-8"))
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, time.time(), len(index_blob)))
+        f.write(index_blob)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+    return offset + len(index_blob) + _SNAPSHOT_HEADER.size
+
+
+def _load_snapshot():
+    if not SNAPSHOT_PATH or IN_POOL_CHILD:
+        return None
+    t0 = time.perf_counter()
+    snap = FeedSnapshot.open(SNAPSHOT_PATH)
+    if snap is None:
+        return None
+    age = time.time() - snap.created_at
+    if age > SNAPSHOT_MAX_AGE:
+        print(f"⚠️ Feed anlık görüntüsü çok eski ({age / 3600:.1f} saat), kullanılmayacak")
+        snap.mm.close()
+        return None
+    print(f"📸 Feed anlık görüntüsü açıldı: {len(snap.index)} feed, {age:.0f} sn önce ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    return snap
+
+
+FEED_SNAPSHOT = _load_snapshot()
+_snapshot_written_at = 0.0
+
+
+def _restore_feed_state(url):
+    """Önbellekte olmayan feed'in durumu anlık görüntüden (varsa)"""
+    if FEED_SNAPSHOT is None:
+        return None
+    state = FEED_SNAPSHOT.get(url)
+    if state is None:
+        return None
+    state["restored"] = True
+    cache_set("feed", url, state)
+    inc("snapshot_restored_total")
+    return state
+
+
+def save_snapshot():
+    """Tüm feed durumlarını diske yazar (hiç yoklanmış feed yoksa dokunmaz)."""
+    global _snapshot_written_at
+    _snapshot_written_at = time.time()
+    states = {}
+    for url in feed_sources():
+        state = cache_get("feed", url)
+        if state and state.get("fetched"):
+            states[url] = state
+    if not states:
+        return
+    try:
+        with timed("snapshot_write_seconds"):
+            write_feed_snapshot(SNAPSHOT_PATH, states)
+    except OSError as e:
+        print("Feed anlık görüntüsü yazılamadı:", e)
+
+
+def maybe_write_snapshot():
+    """SNAPSHOT_SECONDS'ta bir, worker'lar arasında tek yazıcı olacak şekilde arka planda yazar."""
+    if not SNAPSHOT_PATH or time.time() - _snapshot_written_at < SNAPSHOT_SECONDS:
+        return
+    if not CACHE.add("snapshot-writer", _owner_id(), SNAPSHOT_SECONDS):
+        return
+    run_in_background("snapshot", save_snapshot)
+
+
+_bg_executor = None
+_bg_pid = None
+_bg_pending = set()
+# Sıradayken tekrar istenen rerun işleri: bitince bir kez daha çalışır
+_bg_dirty = set()
+_bg_lock = threading.Lock()
+
+
+def run_in_background(key, fn, *args, rerun=False):
+    """
+    fn'i süreç başına bir arka plan havuzunda çalıştırır; aynı key zaten sıradaysa eklemez.
+    rerun=True: sıradaki/çalışan iş bu çağrıdan önceki veriyi okumuş olabilir →
+    iş bitince bir kez daha çalıştırılır (arada gelen istekler tek tekrarda birleşir).
+    """
+    global _bg_executor, _bg_pid
+    with _bg_lock:
+        if _bg_executor is None or _bg_pid != os.getpid():
+            _bg_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="bg")
+            _bg_pid = os.getpid()
+            _bg_pending.clear()
+            _bg_dirty.clear()
+        if key in _bg_pending:
+            if rerun:
+                _bg_dirty.add(key)
+            return
+        _bg_pending.add(key)
+
+    def task():
+        while True:
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Arka plan işi başarısız ({key}):", e)
+            with _bg_lock:
+                if key not in _bg_dirty:
+                    _bg_pending.discard(key)
+                    return
+                _bg_dirty.discard(key)
+
+    _bg_executor.submit(task)
+
+
+# gunicorn worker'ı düzgün kapanırken son durumu da yaz
+if SNAPSHOT_PATH and not IN_POOL_CHILD:
+    atexit.register(save_snapshot)
+
+
+# =================================================
+# Yeni haber yayını (SSE /stream için)
+# =================================================
+# Yoklayıcı yeni haber bulduğunda olaylar bellekteki halka tampona eklenir;
+# bekleyen tüm SSE istemcileri tek bir Condition üzerinden uyanır.
+# Boşta bekleyen istemci upstream'e hiç istek attırmaz.
+STREAM_BUFFER = int(os.environ.get("STREAM_BUFFER", "2000"))
+STREAM_HEARTBEAT = float(os.environ.get("STREAM_HEARTBEAT", "20"))
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", "600"))
+STREAM_MAX_CLIENTS = int(os.environ.get("STREAM_MAX_CLIENTS", "500"))
+
+
+def _feed_categories():
+    """feed URL → o feed'in bulunduğu kategoriler"""
+    out = {}
+    for category, sources in RSS_CATEGORIES.items():
+        for info in sources.values():
+            out.setdefault(info["url"], set()).add(category)
+    return out
+
+
+class NewsBus:
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self.cond = threading.Condition()
+        self.ids = []
+        self.events = []
+        self.last_id = 0
+        self.clients = 0
+
+    def _next_id(self):
+        # Zaman tabanlı artan id → süreç yeniden başlasa da Last-Event-ID anlamlı kalır
+        self.last_id = max(self.last_id + 1, int(time.time() * 1000) * 1000)
+        return self.last_id
+
+    def publish(self, url, source, items):
+        categories = sorted(_feed_categories().get(url, ()))
+        if CACHE.shared:
+            # Paylaşılan akışa ekle; id'yi akış verir, yerel tampon oradan okunur
+            # (kendi olayları dahil) → tüm worker'larda aynı id, aynı sıra
+            try:
+                for it in items:
+                    CACHE.append("news-bus", {"categories": categories, "source": source, "item": it}, self.maxlen)
+            except Exception as e:
+                print("Haber olayları paylaşılamadı:", e)
+            self.sync_from_cache()
+            return
+        with self.cond:
+            for it in items:
+                ev_id = self._next_id()
+                self.ids.append(ev_id)
+                self.events.append({"id": ev_id, "categories": categories, "source": source, "item": it})
+            self._trim()
+            self.cond.notify_all()
+
+    def _trim(self):
+        if len(self.events) > self.maxlen:
+            drop = len(self.events) - self.maxlen
+            del self.ids[:drop]
+            del self.events[:drop]
+
+    def sync_from_cache(self):
+        """Paylaşılan akıştan, bu worker'ın son gördüğü id'den yeni olayları içeri al"""
+        if not CACHE.shared:
+            return
+        with self.cond:
+            try:
+                entries = CACHE.read_after("news-bus", self.last_id)
+            except Exception as e:
+                print("Haber olayları okunamadı:", e)
+                return
+            for ev_id, ev in entries:
+                ev["id"] = ev_id
+                self.ids.append(ev_id)
+                self.events.append(ev)
+            if entries:
+                self.last_id = entries[-1][0]
+                self._trim()
+                self.cond.notify_all()
+
+    def since(self, after_id):
+        """after_id'den sonraki olaylar (lock tutulurken çağrılır)"""
+        return self.events[bisect.bisect_right(self.ids, after_id):]
+
+    def wait(self, after_id, timeout):
+        with self.cond:
+            events = self.since(after_id)
+            if not events:
+                self.cond.wait(timeout)
+                events = self.since(after_id)
+            return events
+
+
+NEWS_BUS = NewsBus(STREAM_BUFFER)
+
+
+def _sse_events(category, site, last_id):
+    """SSE gövdesi: filtreye uyan yeni haberler + periyodik heartbeat"""
+    cursor = NEWS_BUS.last_id if last_id is None else last_id
+    deadline = time.monotonic() + STREAM_MAX_SECONDS
+    yield "retry: 5000\n\n"
+    while time.monotonic() < deadline:
+        events = NEWS_BUS.wait(cursor, STREAM_HEARTBEAT)
+        if not events:
+            yield ": ping\n\n"
+            continue
+        for ev in events:
+            cursor = ev["id"]
+            if category != "all" and category not in ev["categories"]:
+                continue
+            if site and ev["source"] != site:
+                continue
+            data = json.dumps(ev["item"], ensure_ascii=False)
+            yield f"id: {ev['id']}\nevent: news\ndata: {data}\n\n"
+
+
+def _release_stream_slot():
+    with NEWS_BUS.cond:
+        NEWS_BUS.clients -= 1
 
 
 def dedupe_items(items):
@@ -542,38 +2389,112 @@ def dedupe_items(items):
     return unique
 
 
-def fetch_rss(category="all", site=None):
-    """Kategorideki tüm kaynaklardan veya sadece tek bir siteden haberleri getir"""
-    items = []
-    sources = RSS_CATEGORIES.get(category, RSS_CATEGORIES["all"])
+def _published_key(it):
+    return it["published_at_ms"]
 
+
+def category_sources(category="all", site=None):
+    sources = RSS_CATEGORIES.get(category, RSS_CATEGORIES["all"])
     # Eğer sadece belirli bir site seçildiyse
     if site and site in sources:
         sources = {site: sources[site]}
+    return sources
 
+
+def iter_source_items(sources):
+    """
+    Kaynakları paralel çeker; her biri bittikçe (source, yeniden eskiye sıralı
+    haberler) üretir. Feed'ler çoğunlukla zaten sıralı → sort neredeyse doğrusal.
+    """
     with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = [executor.submit(fetch_single, source, info) for source, info in sources.items()]
+        futures = {
+            submit_in_context(executor, fetch_single, source, info): source for source, info in sources.items()
+        }
         for f in concurrent.futures.as_completed(futures):
-            items.extend(f.result())
+            items = f.result()
+            items.sort(key=_published_key, reverse=True)
+            yield futures[f], items
+
+
+def merge_source_items(per_source, sources):
+    """
+    Kaynak başına sıralı listeleri ({source: items}) k-yollu birleştirir, sonra
+    tekrarları atar. Listeler tamamlanma sırasıyla değil `sources` sırasıyla
+    verilir: heapq.merge eşit tarihlerde önceki listeyi öne alır → aynı içerik
+    her istekte aynı sırada (aynı gövde / ETag) döner.
+    """
+    lists = [per_source[source] for source in sources if source in per_source]
+    merged = heapq.merge(*lists, key=_published_key, reverse=True)
+    return dedupe_items(merged)
 
-    items = dedupe_items(items)
-    items.sort(key=lambda x: x["published_at_ms"], reverse=True)
+
+def fetch_rss(category="all", site=None):
+    """Kategorideki tüm kaynaklardan veya sadece tek bir siteden haberleri getir"""
+    sources = category_sources(category, site)
+    per_source = dict(iter_source_items(sources))
+    items = merge_source_items(per_source, sources)
+    maybe_write_snapshot()
     return items
 
 
+def _rss_ndjson(category, site):
+    """
+    /rss akış gövdesi (satır başına bir JSON):
+      {"type": "meta", "category", "sources": [...]}
+      {"type": "source", "source", "items": [...]}      ← her kaynak bittiğinde
+      {"type": "done", "total", "order": [[source, i], ...]}
+    order, tekrarları atılmış ve tarihe göre birleştirilmiş sırayı kaynak
+    olaylarındaki indekslerle verir (haberler ikinci kez gönderilmez).
+    """
+    sources = category_sources(category, site)
+    yield json.dumps({"type": "meta", "category": category, "sources": list(sources)}, ensure_ascii=False) + "\n"
+    per_source = {}
+    for source, items in iter_source_items(sources):
+        # Birleştirmede hangi kaynağın kaçıncı haberi olduğunu taşımak için
+        per_source[source] = [dict(it, _ref=(source, i)) for i, it in enumerate(items)]
+        yield json.dumps({"type": "source", "source": source, "items": with_thumbs(items)}, ensure_ascii=False) + "\n"
+    order = [it["_ref"] for it in merge_source_items(per_source, sources)]
+    maybe_write_snapshot()
+    yield json.dumps({"type": "done", "total": len(order), "order": order}, ensure_ascii=False) + "\n"
+
+
 
 def extract_meta_from_url(url):
+    cached = cache_get("article", url)
+    if cached is not None:
+        return cached
+    with timed("extract_meta_seconds"):
+        return _extract_meta_uncached(url)
+
+
+def _extract_meta_uncached(url):
     try:
-        resp = requests.get(
+        resp = guarded_get(
             url,
-            timeout=12,
+            kind="article",
+            max_bytes=ARTICLE_MAX_BYTES,
             headers={
                 "User-Agent": "Mozilla/5.0",
                 "Accept-Language": "tr-TR,tr;q=0.9,en;q=0.8",
             },
         )
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
+        data = run_parse(_parse_meta_payload, resp.text)
+    except Exception as e:
+        return {"error": str(e)}
+    if "error" not in data:
+        cache_set("article", url, data, ARTICLE_CACHE_TTL)
+    return data
+
+
+def _parse_meta_payload(html):
+    """Haber sayfası HTML'inden başlık/açıklama/görsel/tarih/metin çıkarır (parse havuzunda çalışabilir)."""
+    with timed("article_parse_seconds"):
+        return _parse_meta_html(html)
+
+
+def _parse_meta_html(html):
+    try:
+        soup = bs4.BeautifulSoup(html, "html.parser")
 
         # Başlık / açıklama / görsel
         title = soup.find("meta", property="og:title")
@@ -677,18 +2598,93 @@ def get_rss():
     """RSS endpoint → kategoriye göre haberleri döner"""
     try:
         category = request.args.get("category", "all")
+        # ?stream=1 veya Accept: application/x-ndjson → kaynaklar bittikçe akıt
+        if request.args.get("stream") == "1" or request.accept_mimetypes.best == "application/x-ndjson":
+            return Response(
+                stream_with_context(_rss_ndjson(category, request.args.get("site"))),
+                mimetype="application/x-ndjson",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
         all_items = fetch_rss(category)
         return jsonify(
             {
                 "origin": os.environ.get("RAILWAY_STATIC_URL", "local"),
                 "category": category,
                 "total": len(all_items),
-                "news": all_items,
+                "news": with_thumbs(all_items),
+            }
+        )
+    except Exception as e:
+        print("RSS error:", str(e))
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/metrics")
+def get_metrics():
+    """Prometheus metin formatında aşama metrikleri (tüm worker'lar toplamı)"""
+    return Response(render_prometheus(collect_metrics()), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/health/sources")
+def get_source_health():
+    """Host bazında gecikme / hata oranı / devre durumu"""
+    with _SOURCE_HEALTH_LOCK:
+        hosts = list(_SOURCE_HEALTH.values())
+    return jsonify({"sources": sorted((h.snapshot() for h in hosts), key=lambda x: x["host"])})
+
+
+@app.route("/stream")
+def stream_news():
+    """
+    SSE → yeni görülen haberleri anında iter.
+    ?category=breaking&site=ntv ile filtrelenir; Last-Event-ID ile kaldığı yerden devam eder.
+    Uzun süre açık kalan bağlantı bir thread tutar → gunicorn'u gthread/gevent ile çalıştırın.
+    """
+    category = request.args.get("category", "all")
+    site = request.args.get("site")
+    raw_last = request.headers.get("Last-Event-ID") or request.args.get("lastEventId")
+    try:
+        last_id = int(raw_last) if raw_last else None
+    except ValueError:
+        last_id = None
+
+    with NEWS_BUS.cond:
+        if NEWS_BUS.clients >= STREAM_MAX_CLIENTS:
+            return jsonify({"error": "Çok fazla açık bağlantı, daha sonra tekrar deneyin"}), 503
+        NEWS_BUS.clients += 1
+
+    # Yeni haberleri yoklayıcı bulur → stream açıksa çalıştığından emin ol
+    start_poll_scheduler()
+    resp = Response(
+        stream_with_context(_sse_events(category, site, last_id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Bağlantı hangi aşamada kapanırsa kapansın slotu bırak
+    resp.call_on_close(_release_stream_slot)
+    return resp
+
+
+@app.route("/health/feeds")
+def get_feed_health():
+    """Feed bazında öğrenilmiş yoklama aralığı ve istek sayaçları"""
+    now = time.time()
+    out = []
+    for url in feed_sources():
+        st = get_feed_state(url)
+        out.append(
+            {
+                "url": url,
+                "interval_s": round(st["interval"]) if st.get("interval") else None,
+                "next_poll_in_s": round(st["next_poll"] - now) if st.get("next_poll") else None,
+                "last_change": datetime.fromtimestamp(st["last_change"], LOCAL_TZ).isoformat() if st.get("last_change") else None,
+                "polls": st.get("polls", 0),
+                "not_modified": st.get("not_modified", 0),
+                "items": len(st.get("items", [])),
+                "restored": bool(st.get("restored")),
             }
         )
-    except Exception as e:
-        print("RSS error:", str(e))
-        return jsonify({"error": str(e)}), 500
+    return jsonify({"feeds": out})
 
 
 @app.route("/parse")
@@ -709,14 +2705,21 @@ def parse_url():
 def rewrite():
     try:
         data = request.get_json()
-        print("📩 Gelen data:", data)
+        print("📩 Gelen metin uzunluğu:", len((data or {}).get("text") or ""))
 
         content = data.get("text", "")
         if not content:
             return jsonify({"error": "text parametresi gerekli"}), 400
 
+        # Aynı metin daha önce yeniden yazıldıysa OpenAI'a tekrar gitme
+        cache_key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        cached = cache_get("rewrite-ui", cache_key)
+        if cached is not None:
+            return jsonify(cached)
+
         print("🚀 OpenAI çağrısı başlıyor...")
-        completion = client.chat.completions.create(
+        completion = openai_chat(
+            "rewrite",
             model="gpt-4o-mini",
             messages=[
                 {
@@ -736,7 +2739,8 @@ def rewrite():
             ],
             response_format={ "type": "json_object" }  # ✅ direkt JSON dönecek
         )
-        print("✅ OpenAI cevabı:", completion)
+        usage = getattr(completion, "usage", None)
+        print("✅ OpenAI cevabı alındı, token:", usage.total_tokens if usage else "?")
 
         rewritten_json = completion.choices[0].message.content
         import json
@@ -745,11 +2749,13 @@ def rewrite():
         except Exception:
             return jsonify({"error": "JSON parse edilemedi", "raw": rewritten_json}), 500
 
-        return jsonify({
+        result = {
             "title_ai": parsed.get("title"),
             "rewritten": parsed.get("body"),
             "category": parsed.get("category")
-        })
+        }
+        cache_set("rewrite-ui", cache_key, result, REWRITE_CACHE_TTL)
+        return jsonify(result)
 
     except Exception as e:
         import traceback
@@ -762,15 +2768,36 @@ def rewrite():
 
 
 
+_timed_cursor_class = None
+
+
+def timed_dict_cursor():
+    """
+    DictCursor + sorgu süresi metriği (etiket: SELECT / INSERT / ...).
+    pymysql tembel yüklendiğinden sınıf ilk bağlantıda oluşturulur.
+    """
+    global _timed_cursor_class
+    if _timed_cursor_class is None:
+        class TimedDictCursor(pymysql.cursors.DictCursor):
+            def execute(self, query, args=None):
+                op = query.split(None, 1)[0].upper() if query.strip() else "?"
+                with timed("db_query_seconds", op=op):
+                    return super().execute(query, args)
+
+        _timed_cursor_class = TimedDictCursor
+    return _timed_cursor_class
+
+
 def get_db_connection():
-    return pymysql.connect(
-        host=os.environ.get("DB_HOST"),
-        user=os.environ.get("DB_USER"),
-        password=os.environ.get("DB_PASS"),
-        database=os.environ.get("DB_NAME"),
-        charset="utf8mb4",
-        cursorclass=pymysql.cursors.DictCursor
-    )
+    with timed("db_connect_seconds"):
+        return pymysql.connect(
+            host=os.environ.get("DB_HOST"),
+            user=os.environ.get("DB_USER"),
+            password=os.environ.get("DB_PASS"),
+            database=os.environ.get("DB_NAME"),
+            charset="utf8mb4",
+            cursorclass=timed_dict_cursor()
+        )
 @app.route("/save", methods=["POST"])
 def save_news():
     data = request.get_json()
@@ -800,8 +2827,11 @@ def save_news():
                 VALUES (%s, %s, %s, %s, %s, %s, NOW())
             """
             cursor.execute(sql, (title, slug, content, image, published_at_db, category))
+            news_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        index_news(news_id, title, content, category, published_at_db)
+        refresh_artifacts(category, published_at_db)
         return jsonify({"success": True, "message": "Haber kaydedildi"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -874,7 +2904,7 @@ def get_saved_news():
             r["published_at"] = iso_val
             normalized.append(r)
 
-        return jsonify({"success": True, "news": normalized, "total": total})
+        return jsonify({"success": True, "news": with_thumbs(normalized), "total": total})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 # === Haberleri slug (başlık) ile çek ===
@@ -922,7 +2952,7 @@ def get_news_by_slug(slug):
                     if parsed:
                         row["published_at"] = parsed.astimezone(LOCAL_TZ).isoformat()
 
-                return jsonify({"success": True, "news": row})
+                return jsonify({"success": True, "news": with_thumbs([row])[0]})
 
         return jsonify({"success": False, "error": "Haber bulunamadı"}), 404
     except Exception as e:
@@ -963,8 +2993,13 @@ def news_exists(title, link):
 
 
 def rewrite_with_ai(text):
+    cache_key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    cached = cache_get("rewrite", cache_key)
+    if cached is not None:
+        return cached
     try:
-        completion = client.chat.completions.create(
+        completion = openai_chat(
+            "cron",
             model="gpt-4o-mini",
             messages=[
                 {
@@ -987,7 +3022,9 @@ def rewrite_with_ai(text):
             response_format={"type": "json_object"},
         )
         raw = completion.choices[0].message.content
-        return json.loads(raw)
+        result = json.loads(raw)
+        cache_set("rewrite", cache_key, result, REWRITE_CACHE_TTL)
+        return result
     except Exception as e:
         print("AI rewrite hatası:", e)
         return None
@@ -996,6 +3033,7 @@ def save_ai_news(title, content, image, published_at, category, link):
     """
     AI tarafından yeniden yazılan haberi veritabanına kaydeder.
     Aynı link daha önce kaydedildiyse, UNIQUE constraint sayesinde hata verir.
+    Kayıtlı (veya zaten kayıtlı) ise True, başka bir hatada False döner.
     """
     try:
         # ✅ Tarihi normalize et
@@ -1014,16 +3052,21 @@ def save_ai_news(title, content, image, published_at, category, link):
                 VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
             """
             cursor.execute(sql, (title, slug, content, image, category, published_at_db, link))
+            news_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        index_news(news_id, title, content, category, published_at_db)
+        refresh_artifacts(category, published_at_db)
         print(f"✅ Yeni haber kaydedildi: {title}")
+        return True
 
     except Exception as e:
         # Eğer duplicate key hatası geldiyse görmezden gelebilirsin
         if "Duplicate entry" in str(e):
             print(f"⚠️ Haber zaten kayıtlı, atlandı: {title}")
-        else:
-            print("❌ Kaydetme hatası:", e)
+            return True
+        print("❌ Kaydetme hatası:", e)
+        return False
 
 
         
@@ -1053,29 +3096,988 @@ def get_news_by_id(news_id):
                 if parsed:
                     row["published_at"] = parsed.astimezone(LOCAL_TZ).isoformat()
 
-            return jsonify({"success": True, "news": row})
+            return jsonify({"success": True, "news": with_thumbs([row])[0]})
 
         return jsonify({"success": False, "error": "Haber bulunamadı"}), 404
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+# =================================================
+# Arama indeksi (/news/search)
+# =================================================
+# haberList için gömülü SQLite FTS5 ters indeksi. Metin Python'da Türkçe
+# kurallarıyla normalize edilir (I→ı, İ→i, aksan katlama, kesme işaretinden
+# sonrasını atma, hafif ek budama) ve indekse bu haliyle yazılır; sorgu da
+# aynı işlemden geçer. Sıralama BM25 (başlık ağırlıklı), sayfalama
+# (skor, id) imleciyle yapılır: OFFSET'siz, derin sayfada da sabit maliyet.
+# save_news / save_ai_news yeni kaydı hemen indeksler; arka plandaki eşitleme
+# ise id filigranından sonraki satırları (geçmiş arşiv, başka yoldan eklenenler)
+# parça parça indekse ekler.
+SEARCH_INDEX_PATH = os.environ.get("SEARCH_INDEX_PATH", "/tmp/rss-backend-search.sqlite3")
+SEARCH_SYNC_SECONDS = float(os.environ.get("SEARCH_SYNC_SECONDS", "60"))
+SEARCH_SYNC_BATCH = 500
+SEARCH_TITLE_WEIGHT = 3.0
+SEARCH_MAX_LIMIT = 50
+# Çok yaygın terimlerde BM25 tüm eşleşmeler için hesaplanır; sadece en yeni
+# bu kadar eşleşme sıralanır (gecikme arşiv büyüdükçe artmasın)
+SEARCH_MAX_CANDIDATES = int(os.environ.get("SEARCH_MAX_CANDIDATES", "5000"))
+
+_TR_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+_TR_FOLD = str.maketrans({"ı": "i", "ş": "s", "ç": "c", "ö": "o", "ü": "u", "â": "a", "î": "i", "û": "u"})
+# Ünsüz yumuşaması: şampiyonluğu / şampiyonluk → aynı kök
+_TR_SOFTENED = re.compile(r"ğ[iu]?$")
+_TR_TOKEN = re.compile(r"[^\W_]+(?:['’][^\W_]+)?")
+# Uzundan kısaya; aksan katlamadan sonraki halleri (ı→i, ü→u ...)
+_TR_SUFFIXES = (
+    "larindan", "lerinden", "larinda", "lerinde", "larina", "lerine", "lari", "leri",
+    "lardan", "lerden", "larda", "lerde", "lara", "lere", "lar", "ler",
+    "sinda", "sinde", "sundan", "sunden", "sindan", "sinden", "sina", "sine",
+    "nin", "nun", "dan", "den", "tan", "ten", "daki", "deki", "taki", "teki",
+    "da", "de", "ta", "te", "in", "un", "si", "su",
+)
+_TR_MIN_STEM = 4
+
+
+@functools.lru_cache(maxsize=65536)
+def tr_normalize(word):
+    """Tek kelime → indeks terimi (küçük harf, aksansız, eki budanmış)"""
+    word = word.translate(_TR_LOWER).lower()
+    # Özel isimlerde ek kesme işaretinden sonra gelir: İstanbul'da → istanbul
+    word = re.split(r"['’]", word, maxsplit=1)[0]
+    word = word.translate(_TR_FOLD)
+    for _ in range(2):
+        for suffix in _TR_SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= _TR_MIN_STEM:
+                word = word[: -len(suffix)]
+                break
+        else:
+            break
+    return _TR_SOFTENED.sub("k", word).replace("ğ", "g")
+
+
+def tr_terms(text):
+    return [tr_normalize(w) for w in _TR_TOKEN.findall(text or "")]
+
+
+class SearchIndex:
+    """FTS5 tablosu + eşitleme filigranı; bağlantılar thread/fork başına."""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5("
+            "title, body, category UNINDEXED, published_at UNINDEXED, tokenize='unicode61')"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS search_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def add_many(self, rows):
+        """rows: (id, title, content, category, published_at)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO news_fts (rowid, title, body, category, published_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (int(i), " ".join(tr_terms(t)), " ".join(tr_terms(c)), cat or "", str(pub or ""))
+                    for i, t, c, cat, pub in rows
+                ],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def watermark(self):
+        row = self._conn().execute("SELECT value FROM search_meta WHERE key = 'synced_id'").fetchone()
+        return int(row[0]) if row else 0
+
+    def set_watermark(self, news_id):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO search_meta (key, value) VALUES ('synced_id', ?)", (str(int(news_id)),)
+        )
+
+    def search(self, terms, category=None, limit=20, after=None):
+        """[(id, skor)] — skor küçükten büyüğe (FTS5 bm25 negatif döner)"""
+        match = " ".join('"%s"' % t.replace('"', "") for t in terms)
+        conn = self._conn()
+        score = f"bm25(news_fts, {SEARCH_TITLE_WEIGHT}, 1.0)"
+        sql = f"SELECT rowid, {score} AS score FROM news_fts WHERE news_fts MATCH ?"
+        params = [match]
+        # rowid aralığı FTS5'e iletilir → puanlama en yeni adaylarla sınırlı.
+        # Kategori filtresi taban sorgusunda da uygulanır; yoksa tabanın üstü başka
+        # kategorilerle dolunca filtrelenen kategorinin eski eşleşmeleri kaybolur
+        floor_sql = "SELECT rowid FROM news_fts WHERE news_fts MATCH ?"
+        floor_params = [match]
+        if category:
+            floor_sql += " AND category = ?"
+            floor_params.append(category)
+        floor = conn.execute(
+            floor_sql + " ORDER BY rowid DESC LIMIT 1 OFFSET ?", floor_params + [SEARCH_MAX_CANDIDATES - 1]
+        ).fetchone()
+        if floor:
+            sql += " AND rowid >= ?"
+            params.append(floor[0])
+        if category:
+            sql += " AND category = ?"
+            params.append(category)
+        if after:
+            sql += f" AND ({score} > ? OR ({score} = ? AND rowid > ?))"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY score, rowid LIMIT ?"
+        params.append(limit)
+        return conn.execute(sql, params).fetchall()
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+_search_synced_at = 0.0
+
+
+def get_search_index():
+    global _search_index
+    if _search_index is None:
+        with _search_index_lock:
+            if _search_index is None:
+                _search_index = SearchIndex(SEARCH_INDEX_PATH)
+    return _search_index
+
+
+def index_news(news_id, title, content, category, published_at):
+    """Yeni kaydı indekse ekler; hata kaydı engellemez (eşitleme sonra yakalar)."""
+    if not news_id:
+        return
+    try:
+        get_search_index().add_many([(news_id, title, content, category, published_at)])
+    except Exception as e:
+        print("Arama indeksine eklenemedi:", e)
+
+
+def sync_search_index(max_batches=None):
+    """Filigrandan sonraki haberList satırlarını parça parça indeksler."""
+    index = get_search_index()
+    done = 0
+    while max_batches is None or done < max_batches:
+        last_id = index.watermark()
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT id, title, content, category, published_at FROM haberList WHERE id > %s ORDER BY id LIMIT %s",
+                    (last_id, SEARCH_SYNC_BATCH),
+                )
+                rows = cursor.fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            break
+        index.add_many([(r["id"], r["title"], r["content"], r["category"], r["published_at"]) for r in rows])
+        index.set_watermark(rows[-1]["id"])
+        done += 1
+    return done
+
+
+def maybe_sync_search_index():
+    global _search_synced_at
+    if time.time() - _search_synced_at < SEARCH_SYNC_SECONDS:
+        return
+    _search_synced_at = time.time()
+    if CACHE.add("search-sync", _owner_id(), SEARCH_SYNC_SECONDS):
+        run_in_background("search-sync", sync_search_index)
+
+
+def _encode_cursor(score, news_id):
+    raw = json.dumps([score, news_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(token):
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    score, news_id = json.loads(raw)
+    return float(score), int(news_id)
+
+
+@app.route("/news/search", methods=["GET"])
+def search_news():
+    """
+    /news/search?q=...&category=spor&limit=20&cursor=...
+    BM25 ile sıralı sonuçlar; sonraki sayfa için next_cursor döner.
+    """
+    q = (request.args.get("q") or "").strip()
+    category = request.args.get("category")
+    if category == "all":
+        category = None
+    try:
+        limit = max(1, min(SEARCH_MAX_LIMIT, int(request.args.get("limit", 20))))
+        after = _decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+    except (ValueError, TypeError):
+        return jsonify({"success": False, "error": "Geçersiz limit veya cursor"}), 400
+
+    terms = [t for t in tr_terms(q) if t][:10]
+    if not terms:
+        return jsonify({"success": False, "error": "q gerekli"}), 400
+
+    maybe_sync_search_index()
+    try:
+        with timed("search_query_seconds"):
+            hits = get_search_index().search(terms, category, limit + 1, after)
+        more = len(hits) > limit
+        hits = hits[:limit]
+        rows = {}
+        if hits:
+            conn = get_db_connection()
+            with conn.cursor() as cursor:
+                placeholders = ", ".join(["%s"] * len(hits))
+                cursor.execute(
+                    f"SELECT id, title, slug, content, image, category, published_at FROM haberList WHERE id IN ({placeholders})",
+                    [h[0] for h in hits],
+                )
+                rows = {r["id"]: r for r in cursor.fetchall()}
+            conn.close()
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+    results = []
+    for news_id, score in hits:
+        r = rows.get(news_id)
+        if not r:  # indekste olup tablodan silinmiş
+            continue
+        dt = r.get("published_at")
+        if isinstance(dt, datetime):
+            if dt.tzinfo is None:
+                dt = LOCAL_TZ.localize(dt)
+            r["published_at"] = dt.astimezone(LOCAL_TZ).isoformat()
+        elif isinstance(dt, str):
+            parsed = parse_tr_date(dt)
+            r["published_at"] = parsed.astimezone(LOCAL_TZ).isoformat() if parsed else dt
+        content = r.pop("content") or ""
+        r["excerpt"] = content[:240].rsplit(" ", 1)[0] + "…" if len(content) > 240 else content
+        r["score"] = float(f"{-score:.4g}")
+        results.append(r)
+
+    return jsonify(
+        {
+            "success": True,
+            "query": q,
+            "news": with_thumbs(results),
+            "next_cursor": _encode_cursor(hits[-1][1], hits[-1][0]) if more else None,
+        }
+    )
+
+
+# =================================================
+# Yayın çıktıları: /feed.xml ve sitemap'ler
+# =================================================
+# Kaydedilen haberler için RSS 2.0 feed'i (kategori başına) ve sitemap index +
+# aylık sitemap'ler. Çıktılar önceden üretilip gzip/brotli halleriyle birlikte
+# önbellekte ("artifact") tutulur: tarayıcı istekleri DB'ye hiç gitmez.
+# save_news / save_ai_news sadece etkilenen feed'leri ve ayı arka planda
+# yeniden üretir; ARTIFACT_TTL dışarıdan eklenen kayıtlar için üst sınırdır.
+SITE_URL = os.environ.get("SITE_URL", "https://resulkacar.com").rstrip("/")
+NEWS_URL_TEMPLATE = os.environ.get("NEWS_URL_TEMPLATE", "{site}/haber/{slug}")
+PUBLIC_API_URL = os.environ.get("PUBLIC_API_URL", "").rstrip("/")
+FEED_XML_ITEMS = int(os.environ.get("FEED_XML_ITEMS", "50"))
+ARTIFACT_TTL = int(os.environ.get("ARTIFACT_TTL", "3600"))
+SITEMAP_MAX_URLS = 50000  # sitemap protokolü sınırı
+_ARTIFACT_NAME = re.compile(r"^(feed:[\w-]{1,40}|sitemap:index|sitemap:\d{4}-(0[1-9]|1[0-2]))$")
+
+_ARTIFACT_LOCK = threading.Lock()
+_ARTIFACT_BUILD_LOCKS = {}
+_ARTIFACT_MEMO = {}  # name → (etag, {encoding: bytes}); base64 çözümü isabet başına yapılmasın
+
+
+def _api_base():
+    """
+    Sitemap / feed / küçük görsel linkleri için API'nin dışarıdan görünen kökü.
+    Sadece ayardan: istek başlıkları (Host) önbelleğe giren çıktılara sızmasın.
+    """
+    if PUBLIC_API_URL:
+        return PUBLIC_API_URL
+    if os.environ.get("RAILWAY_STATIC_URL"):
+        return "https://" + os.environ["RAILWAY_STATIC_URL"]
+    return f"http://localhost:{os.environ.get('PORT', 5000)}"
+
+
+def _known_categories():
+    """haberList'teki kategoriler (ARTIFACT_TTL boyunca önbellekte)"""
+    categories = cache_get("artifact", "categories")
+    if categories is None:
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT DISTINCT category FROM haberList WHERE category IS NOT NULL")
+                categories = sorted(r["category"] for r in cursor.fetchall() if r["category"])
+        finally:
+            conn.close()
+        cache_set("artifact", "categories", categories, ARTIFACT_TTL)
+    return categories
+
+
+def _known_months():
+    """Sitemap index'te yer alan aylar (index ile birlikte üretilir)"""
+    months = cache_get("artifact", "months")
+    if months is None:
+        build_artifact("sitemap:index")
+        months = cache_get("artifact", "months") or []
+    return months
+
+
+def _news_url(row):
+    slug = row.get("slug") or slugify_title(row["title"])
+    return NEWS_URL_TEMPLATE.format(site=SITE_URL, slug=slug, id=row["id"])
+
+
+def _as_local(value):
+    if isinstance(value, str):
+        value = parse_tr_date(value)
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = LOCAL_TZ.localize(value)
+    return value.astimezone(LOCAL_TZ)
+
+
+def _build_feed_xml(category):
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            sql = "SELECT id, title, slug, content, image, category, published_at FROM haberList"
+            params = []
+            if category != "all":
+                sql += " WHERE category = %s"
+                params.append(category)
+            sql += " ORDER BY published_at DESC LIMIT %s"
+            params.append(FEED_XML_ITEMS)
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    self_url = f"{_api_base()}/feed.xml" + (f"?category={category}" if category != "all" else "")
+    out = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">',
+        "<channel>",
+        f"<title>{xml_escape('Haberler' + ('' if category == 'all' else ' - ' + category))}</title>",
+        f"<link>{xml_escape(SITE_URL)}</link>",
+        "<description>Son haberler</description>",
+        "<language>tr</language>",
+        f'<atom:link href="{xml_escape(self_url)}" rel="self" type="application/rss+xml"/>',
+    ]
+    for row in rows:
+        link = xml_escape(_news_url(row))
+        content = row.get("content") or ""
+        summary = content[:300].rsplit(" ", 1)[0] + "…" if len(content) > 300 else content
+        out.append("<item>")
+        out.append(f"<title>{xml_escape(row['title'] or '')}</title>")
+        out.append(f"<link>{link}</link>")
+        out.append(f'<guid isPermaLink="true">{link}</guid>')
+        published = _as_local(row.get("published_at"))
+        if published:
+            out.append(f"<pubDate>{format_datetime(published)}</pubDate>")
+        if row.get("category"):
+            out.append(f"<category>{xml_escape(row['category'])}</category>")
+        out.append(f"<description>{xml_escape(summary)}</description>")
+        if row.get("image"):
+            image = xml_escape(row["image"], {'"': "&quot;"})
+            out.append(f'<enclosure url="{image}" type="image/jpeg" length="0"/>')
+        out.append("</item>")
+    out += ["</channel>", "</rss>"]
+    return "\n".join(out), "application/rss+xml; charset=utf-8"
+
+
+def _build_sitemap_month(month):
+    year, mon = (int(x) for x in month.split("-"))
+    start = f"{year:04d}-{mon:02d}-01 00:00:00"
+    end = f"{year + mon // 12:04d}-{mon % 12 + 1:02d}-01 00:00:00"
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, title, slug, published_at FROM haberList"
+                " WHERE published_at >= %s AND published_at < %s ORDER BY published_at LIMIT %s",
+                (start, end, SITEMAP_MAX_URLS),
+            )
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+    out = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for row in rows:
+        out.append(f"<url><loc>{xml_escape(_news_url(row))}</loc>")
+        published = _as_local(row.get("published_at"))
+        if published:
+            out.append(f"<lastmod>{published.isoformat()}</lastmod>")
+        out.append("</url>")
+    out.append("</urlset>")
+    return "\n".join(out), "application/xml; charset=utf-8"
+
+
+def _build_sitemap_index():
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT SUBSTRING(published_at, 1, 7) AS month, MAX(published_at) AS lastmod"
+                " FROM haberList WHERE published_at IS NOT NULL GROUP BY month ORDER BY month"
+            )
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+    cache_set("artifact", "months", [row["month"] for row in rows], ARTIFACT_TTL)
+    out = ['<?xml version="1.0" encoding="UTF-8"?>', '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for row in rows:
+        out.append(f"<sitemap><loc>{xml_escape(_api_base())}/sitemaps/{row['month']}.xml</loc>")
+        lastmod = _as_local(row.get("lastmod"))
+        if lastmod:
+            out.append(f"<lastmod>{lastmod.isoformat()}</lastmod>")
+        out.append("</sitemap>")
+    out.append("</sitemapindex>")
+    return "\n".join(out), "application/xml; charset=utf-8"
+
+
+def build_artifact(name):
+    """Çıktıyı üretir, sıkıştırılmış halleriyle önbelleğe yazar ve döner."""
+    kind, _, arg = name.partition(":")
+    if kind == "feed":
+        body, mimetype = _build_feed_xml(arg)
+    elif arg == "index":
+        body, mimetype = _build_sitemap_index()
+    else:
+        body, mimetype = _build_sitemap_month(arg)
+    raw = body.encode("utf-8")
+    artifact = {
+        "etag": hashlib.sha256(raw).hexdigest()[:32],
+        "mimetype": mimetype,
+        "built_at": time.time(),
+        "identity": base64.b64encode(raw).decode("ascii"),
+        "gzip": base64.b64encode(gzip.compress(raw, compresslevel=9)).decode("ascii"),
+    }
+    if brotli is not None:
+        artifact["br"] = base64.b64encode(brotli.compress(raw, quality=11)).decode("ascii")
+    cache_set("artifact", name, artifact, ARTIFACT_TTL)
+    return artifact
+
+
+def get_artifact(name):
+    artifact = cache_get("artifact", name)
+    if artifact is not None:
+        return artifact
+    # Aynı çıktıyı aynı anda tek thread üretsin
+    with _ARTIFACT_LOCK:
+        lock = _ARTIFACT_BUILD_LOCKS.setdefault(name, threading.Lock())
+    try:
+        with lock:
+            return cache_get("artifact", name) or build_artifact(name)
+    finally:
+        with _ARTIFACT_LOCK:
+            _ARTIFACT_BUILD_LOCKS.pop(name, None)
+
+
+def refresh_artifacts(category, published_at):
+    """Yeni kayıttan etkilenen çıktıları arka planda yeniden üretir."""
+    names = ["feed:all", "sitemap:index", f"sitemap:{str(published_at)[:7]}"]
+    if category and category != "all":
+        names.append(f"feed:{category}")
+        categories = cache_get("artifact", "categories")
+        if categories is not None and category not in categories:
+            cache_set("artifact", "categories", sorted(categories + [category]), ARTIFACT_TTL)
+    for name in names:
+        if _ARTIFACT_NAME.match(name):
+            # Çalışan yeniden üretim bu kaydı görmemiş olabilir → bitince tekrarla
+            run_in_background(f"artifact:{name}", build_artifact, name, rerun=True)
+
+
+def serve_artifact(name):
+    if not _ARTIFACT_NAME.match(name):
+        return jsonify({"error": "Geçersiz istek"}), 400
+    kind, _, arg = name.partition(":")
+    try:
+        # Sadece var olan kategori / ay: istemci keyfi çıktı ürettiremesin
+        if kind == "feed" and arg != "all" and arg not in _known_categories():
+            return jsonify({"error": "Kategori bulunamadı"}), 404
+        if kind == "sitemap" and arg != "index" and arg not in _known_months():
+            return jsonify({"error": "Sitemap bulunamadı"}), 404
+        artifact = get_artifact(name)
+    except Exception as e:
+        print(f"{name} üretilemedi:", e)
+        return jsonify({"error": str(e)}), 500
+
+    encoding = "identity"
+    if "br" in artifact and request.accept_encodings["br"] > 0:
+        encoding = "br"
+    elif request.accept_encodings["gzip"] > 0:
+        encoding = "gzip"
+    memo = _ARTIFACT_MEMO.get(name)
+    if memo is None or memo[0] != artifact["etag"]:
+        memo = (artifact["etag"], {})
+        _ARTIFACT_MEMO[name] = memo
+    body = memo[1].get(encoding)
+    if body is None:
+        body = memo[1][encoding] = base64.b64decode(artifact[encoding])
+
+    resp = Response(body, mimetype=artifact["mimetype"].split(";")[0])
+    resp.headers["Content-Type"] = artifact["mimetype"]
+    resp.headers["Cache-Control"] = "public, max-age=300, stale-while-revalidate=3600"
+    resp.set_etag(artifact["etag"] if encoding == "identity" else f"{artifact['etag']}-{encoding}")
+    resp.last_modified = datetime.fromtimestamp(artifact["built_at"], timezone.utc)
+    resp.vary.add("Accept-Encoding")
+    if encoding != "identity":
+        resp.headers["Content-Encoding"] = encoding
+    return resp.make_conditional(request)
+
+
+@app.route("/feed.xml")
+def news_feed_xml():
+    """Kaydedilen haberlerin RSS 2.0 feed'i (?category=spor)"""
+    return serve_artifact(f"feed:{request.args.get('category', 'all')}")
+
+
+@app.route("/sitemap.xml")
+def sitemap_index():
+    return serve_artifact("sitemap:index")
+
+
+@app.route("/sitemaps/<month>.xml")
+def sitemap_month(month):
+    return serve_artifact(f"sitemap:{month}")
+
+
+# =================================================
+# Görsel proxy'si (/img): boyut kovalı WebP küçük görseller
+# =================================================
+# Yayıncı görselleri çoğu zaman MB'lık orijinaller. /img?u=<url>&w=<genişlik>&s=<imza>
+# orijinali bir kez indirir, genişliği IMG_WIDTHS kovasına yuvarlayıp WebP
+# küçük görsel üretir ve diskte LRU önbellekte tutar (uzun süreli, immutable
+# Cache-Control). İmza sadece URL'yi kapsar: istemci srcset için kovayı
+# seçebilir ama sunucu açık proxy olmaz. IMG_PROXY_SECRET yoksa proxy kapalıdır.
+IMG_PROXY_SECRET = os.environ.get("IMG_PROXY_SECRET", "")
+IMG_WIDTHS = tuple(int(w) for w in os.environ.get("IMG_WIDTHS", "160,320,480,640,960,1280").split(","))
+IMG_DEFAULT_WIDTH = int(os.environ.get("IMG_DEFAULT_WIDTH", "480"))
+IMG_MAX_BYTES = int(os.environ.get("IMG_MAX_BYTES", str(10 * 1024 * 1024)))
+IMG_MAX_PIXELS = 40_000_000  # açılmış görsel bombalarına karşı
+IMG_QUALITY = int(os.environ.get("IMG_QUALITY", "78"))
+IMG_CACHE_DIR = os.environ.get("IMG_CACHE_DIR", "/tmp/rss-backend-img")
+IMG_CACHE_MAX_BYTES = int(os.environ.get("IMG_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+IMG_FAIL_TTL = 600
+IMG_MAX_REDIRECTS = 3
+
+_IMG_LOCK = threading.Lock()
+_IMG_BUILD_LOCKS = {}
+_img_cache_bytes = None  # süreç içi tahmini toplam; eşik aşılınca dizin taranır
+
+
+def _img_signature(url):
+    digest = hmac.new(IMG_PROXY_SECRET.encode("utf-8"), url.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:12]).decode("ascii")
+
+
+def _img_bucket(width):
+    for w in IMG_WIDTHS:
+        if width <= w:
+            return w
+    return IMG_WIDTHS[-1]
+
+
+def thumb_url(image, width=IMG_DEFAULT_WIDTH, base=""):
+    """Görsel URL'si → imzalı /img adresi (proxy kapalıysa / URL uygun değilse None)"""
+    if not IMG_PROXY_SECRET or not image or not image.startswith(("http://", "https://")):
+        return None
+    query = urlencode({"u": image, "w": _img_bucket(width), "s": _img_signature(image)})
+    return f"{base}/img?{query}"
+
+
+def with_thumbs(items):
+    """
+    API çıktısındaki haberlere image_thumb ekler. Adres ayardaki açık API
+    kökünden kurulur (TLS sonlandıran proxy arkasında request.host_url http:// verir).
+    """
+    if not IMG_PROXY_SECRET:
+        return items
+    base = _api_base()
+    for it in items:
+        it["image_thumb"] = thumb_url(it.get("image"), base=base)
+    return items
+
+
+def _make_thumbnail(data, width):
+    """Orijinal bayt → WebP küçük görsel (parse havuzunda çalışabilir)."""
+    # Vekil değil gerçek modül: Pillow'un kendi bomba kontrolü de bu sınırı kullansın
+    PIL_Image._load().MAX_IMAGE_PIXELS = IMG_MAX_PIXELS
+    img = PIL_Image.open(io.BytesIO(data))
+    # open() sadece başlığı okur; piksel verisi açılmadan boyutu reddet
+    if img.size[0] * img.size[1] > IMG_MAX_PIXELS:
+        raise ValueError(f"görsel {img.size[0]}x{img.size[1]} piksel sınırını aşıyor")
+    # JPEG'de tam çözünürlüğü hiç açmadan 1/2, 1/4, 1/8 ölçekli çöz
+    img.draft("RGB", (width, width * 4))
+    img = PIL_ImageOps.exif_transpose(img)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+    if img.width > width:
+        img.thumbnail((width, width * 4), PIL_Image.LANCZOS)
+    out = io.BytesIO()
+    img.save(out, "WEBP", quality=IMG_QUALITY, method=4)
+    return out.getvalue()
+
+
+def _is_public_url(url):
+    """
+    http(s) ve host'un çözüldüğü tüm adresler genel (internet) adresi mi?
+    /save ile keyfi görsel URL'si girilebildiğinden iç ağa (loopback, özel,
+    link-local, metadata servisleri ...) istek attırılmasın.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return False
+    try:
+        infos = socket.getaddrinfo(parsed.hostname, parsed.port or None, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError, ValueError):
+        return False
+    for info in infos:
+        addr = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if addr.version == 6 and addr.ipv4_mapped:
+            addr = addr.ipv4_mapped
+        if not addr.is_global:
+            return False
+    return bool(infos)
+
+
+def _fetch_public_image(url):
+    """
+    Yönlendirmeleri elle izler; her adımda hedef yeniden denetlenir. Denetim
+    sadece indirme yolunda: önbellekteki küçük görsel DNS sorgusu beklemez.
+    Sınırlama: requests bağlanırken host'u yeniden çözer; denetimle bağlantı
+    arasında kaydını değiştiren bir DNS sunucusu (DNS rebinding) iç adrese
+    yönlendirebilir. Yanıt istemciye sadece yeniden kodlanmış görsel olarak
+    döner, ham gövde ve başlıklar sızmaz.
+    """
+    for _ in range(IMG_MAX_REDIRECTS + 1):
+        if not _is_public_url(url):
+            raise ValueError(f"izin verilmeyen görsel adresi: {url}")
+        resp = guarded_get(
+            url,
+            kind="image",
+            max_bytes=IMG_MAX_BYTES,
+            allow_redirects=False,
+            headers={"User-Agent": "Mozilla/5.0"},
+        )
+        if not resp.is_redirect:
+            return resp
+        url = urljoin(url, resp.headers["Location"])
+    raise ValueError("çok fazla yönlendirme")
+
+
+def _img_cache_path(url, width):
+    key = hashlib.sha256(f"{url}|{width}".encode("utf-8")).hexdigest()
+    return os.path.join(IMG_CACHE_DIR, key[:2], f"{key}.webp")
+
+
+def _img_cache_store(path, data):
+    global _img_cache_bytes
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    with _IMG_LOCK:
+        if _img_cache_bytes is None:
+            _img_cache_bytes = _img_cache_scan()[1]
+        else:
+            _img_cache_bytes += len(data)
+        over = _img_cache_bytes > IMG_CACHE_MAX_BYTES
+    if over:
+        run_in_background("img-evict", _img_cache_evict)
+
+
+def _img_cache_scan():
+    files = []
+    total = 0
+    for root, _, names in os.walk(IMG_CACHE_DIR):
+        for name in names:
+            if not name.endswith(".webp"):
+                continue
+            full = os.path.join(root, name)
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, full))
+            total += st.st_size
+    return files, total
+
+
+def _img_cache_evict():
+    """En uzun süredir kullanılmayanları (mtime) sınırın %90'ına inene kadar siler."""
+    global _img_cache_bytes
+    files, total = _img_cache_scan()
+    target = IMG_CACHE_MAX_BYTES * 0.9
+    for _, size, full in sorted(files):
+        if total <= target:
+            break
+        try:
+            os.remove(full)
+            total -= size
+        except OSError:
+            pass
+    with _IMG_LOCK:
+        _img_cache_bytes = total
+
+
+def get_thumbnail(url, width):
+    """Önbellekteki küçük görselin yolu; yoksa üretir. Üretilemezse None."""
+    path = _img_cache_path(url, width)
+    if os.path.exists(path):
+        try:
+            os.utime(path)  # LRU: son kullanım
+        except OSError:
+            pass
+        return path
+    if cache_get("img-fail", path):
+        return None
+    with _IMG_LOCK:
+        lock = _IMG_BUILD_LOCKS.setdefault(path, threading.Lock())
+    with lock:
+        if os.path.exists(path):
+            return path
+        if cache_get("img-fail", path):
+            return None
+        try:
+            resp = _fetch_public_image(url)
+            if resp.truncated:
+                raise ValueError(f"görsel {IMG_MAX_BYTES} bayt sınırını aşıyor")
+            with timed("thumbnail_seconds"):
+                data = run_parse(_make_thumbnail, resp.content, width)
+            _img_cache_store(path, data)
+            return path
+        except Exception as e:
+            print(f"Küçük görsel üretilemedi ({url}):", e)
+            cache_set("img-fail", path, 1, IMG_FAIL_TTL)
+            return None
+        finally:
+            with _IMG_LOCK:
+                _IMG_BUILD_LOCKS.pop(path, None)
+
+
+@app.route("/img")
+def image_proxy():
+    url = request.args.get("u") or ""
+    sig = request.args.get("s") or ""
+    if not IMG_PROXY_SECRET:
+        return jsonify({"error": "Görsel proxy'si kapalı"}), 404
+    if not url.startswith(("http://", "https://")) or not hmac.compare_digest(sig, _img_signature(url)):
+        return jsonify({"error": "Geçersiz imza"}), 403
+    try:
+        width = _img_bucket(int(request.args.get("w", IMG_DEFAULT_WIDTH)))
+    except ValueError:
+        return jsonify({"error": "Geçersiz genişlik"}), 400
+
+    path = get_thumbnail(url, width)
+    if path is None:
+        # Pillow yok / görsel işlenemedi → istemci en azından orijinali alsın
+        resp = redirect(url, 302)
+        resp.headers["Cache-Control"] = f"public, max-age={IMG_FAIL_TTL}"
+        return resp
+    resp = send_file(path, mimetype="image/webp", conditional=True, etag=os.path.basename(path)[:-5], max_age=31536000)
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp
+
+
+# =================================================
+# /cron kilitleri: kategori başına lease + link başına claim
+# =================================================
+# Zamanlayıcı ve retry'lar aynı anda /cron tetikleyebilir. Kategori lease'i
+# aynı kategori için tek çalışmaya izin verir; link claim'leri ise farklı
+# kategorilerden/instance'lardan gelse bile her haberin en fazla bir kez
+# çekilip yeniden yazılmasını garanti eder. Zamanlar Python'dan UTC verilir.
+CRON_LEASE_TTL = int(os.environ.get("CRON_LEASE_TTL", "600"))
+CRON_CLAIM_TTL = int(os.environ.get("CRON_CLAIM_TTL", "900"))
+CRON_MAX_ATTEMPTS = int(os.environ.get("CRON_MAX_ATTEMPTS", "3"))
+
+_cron_tables_ready = False
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _ensure_cron_tables():
+    global _cron_tables_ready
+    if _cron_tables_ready:
+        return
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS cron_leases (
+                    name VARCHAR(64) NOT NULL PRIMARY KEY,
+                    owner VARCHAR(128) NOT NULL,
+                    expires_at DATETIME NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS cron_claims (
+                    link_hash CHAR(64) NOT NULL PRIMARY KEY,
+                    link TEXT NOT NULL,
+                    owner VARCHAR(128) NOT NULL,
+                    status VARCHAR(16) NOT NULL,
+                    attempts INT NOT NULL DEFAULT 1,
+                    claimed_at DATETIME NOT NULL
+                )
+            """)
+        conn.commit()
+    finally:
+        conn.close()
+    _cron_tables_ready = True
+
+
+def acquire_cron_lease(name, owner, ttl=CRON_LEASE_TTL):
+    """Lease boşsa/süresi dolmuşsa al, zaten bizimse uzat. Alındıysa True."""
+    _ensure_cron_tables()
+    now = _utcnow()
+    expires = now + timedelta(seconds=ttl)
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "INSERT IGNORE INTO cron_leases (name, owner, expires_at) VALUES (%s, %s, %s)",
+                (name, owner, expires),
+            )
+            acquired = cursor.rowcount == 1
+            if not acquired:
+                cursor.execute(
+                    """
+                    UPDATE cron_leases SET owner = %s, expires_at = %s
+                    WHERE name = %s AND (owner = %s OR expires_at < %s)
+                    """,
+                    (owner, expires, name, owner, now),
+                )
+                # MySQL değişmeyen satırı saymaz → sahipliği ayrıca doğrula
+                cursor.execute("SELECT owner FROM cron_leases WHERE name = %s", (name,))
+                row = cursor.fetchone()
+                acquired = bool(row) and row["owner"] == owner
+        conn.commit()
+        return acquired
+    finally:
+        conn.close()
+
+
+def release_cron_lease(name, owner):
+    try:
+        conn = get_db_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM cron_leases WHERE name = %s AND owner = %s", (name, owner))
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print("Lease bırakılamadı:", e)
+
+
+def claim_link(link, owner):
+    """
+    Link'i bu çalışma için sahiplen. Başka çalışma üzerindeyse / bitirdiyse False.
+    Süresi geçmiş claim'ler ve CRON_MAX_ATTEMPTS'i aşmamış hatalar devralınır.
+    """
+    now = _utcnow()
+    link_hash = hashlib.sha256(link.encode("utf-8")).hexdigest()
+    try:
+        conn = get_db_connection()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT IGNORE INTO cron_claims (link_hash, link, owner, status, attempts, claimed_at)
+                VALUES (%s, %s, %s, 'claimed', 1, %s)
+                """,
+                (link_hash, link, owner, now),
+            )
+            claimed = cursor.rowcount == 1
+            if not claimed:
+                cursor.execute(
+                    """
+                    UPDATE cron_claims
+                    SET owner = %s, status = 'claimed', attempts = attempts + 1, claimed_at = %s
+                    WHERE link_hash = %s AND attempts < %s
+                      AND (status = 'failed' OR (status = 'claimed' AND claimed_at < %s))
+                    """,
+                    (owner, now, link_hash, CRON_MAX_ATTEMPTS, now - timedelta(seconds=CRON_CLAIM_TTL)),
+                )
+                claimed = cursor.rowcount == 1
+        conn.commit()
+        conn.close()
+        return claimed
+    except Exception as e:
+        # Emin değilsek işleme: en fazla bir kez > en az bir kez
+        print("Claim hatası:", e)
+        return False
+
 
+def finish_claim(link, owner, status):
+    """status: 'done' | 'failed'"""
+    link_hash = hashlib.sha256(link.encode("utf-8")).hexdigest()
+    try:
+        conn = get_db_connection()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "UPDATE cron_claims SET status = %s WHERE link_hash = %s AND owner = %s",
+                (status, link_hash, owner),
+            )
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print("Claim güncellenemedi:", e)
 
 
 def fetch_and_process(category="all", site=None):
     print(f"🚀 {category} kategorisi ({site or 'tüm siteler'}) için yeni haberler kontrol ediliyor...")
-    items = fetch_rss(category, site)  # site filtresi ekledik
+    lease_name = f"cron:{category}:{site or '*'}"
+    owner = f"{_owner_id()}:{uuid.uuid4().hex[:8]}"
+    try:
+        if not acquire_cron_lease(lease_name, owner):
+            print(f"⏭️ {category} için başka bir /cron çalışıyor, atlandı")
+            return {"locked": True, "saved": 0}
+    except Exception as e:
+        print("❌ Lease alınamadı:", e)
+        return {"locked": True, "saved": 0, "error": str(e)}
+
+    try:
+        return _process_items(fetch_rss(category, site), category, lease_name, owner)  # site filtresi ekledik
+    finally:
+        release_cron_lease(lease_name, owner)
+
 
+def _process_items(items, category, lease_name, owner):
+    saved = 0
+    renewed_at = time.monotonic()
     for item in items:
+        title = item.get("title")
+        link = item.get("link")
         try:
-            title = item["title"]
-            link = item["link"]
-
             # Haber daha önce kaydedilmiş mi?
             if news_exists(title, link):
                 continue  # zaten var → atla
 
+            # Başka bir çalışma bu linki almış/bitirmiş mi?
+            if not link or not claim_link(link, owner):
+                continue
+
+            # Uzun süren çalışmada lease'i tazele; kaybettiysek dur
+            if time.monotonic() - renewed_at > CRON_LEASE_TTL / 3:
+                if not acquire_cron_lease(lease_name, owner):
+                    print(f"⚠️ {lease_name} lease'i kaybedildi, çalışma durduruluyor")
+                    finish_claim(link, owner, "failed")
+                    break
+                renewed_at = time.monotonic()
+
             # 🔹 Haberin tam içeriğini çek
             meta = extract_meta_from_url(link)
             full_text = ""
@@ -1092,10 +4094,11 @@ def fetch_and_process(category="all", site=None):
             ai_result = rewrite_with_ai(raw_text)
             if not ai_result:
                 print(f"⚠️ AI sonucu alınamadı: {title}")
+                finish_claim(link, owner, "failed")
                 continue
 
             # 🔹 Veritabanına kaydet
-            save_ai_news(
+            ok = save_ai_news(
                 title=ai_result.get("title") or title,
                 content=ai_result.get("body") or full_text,
                 image=item.get("image"),
@@ -1103,16 +4106,54 @@ def fetch_and_process(category="all", site=None):
                 category=ai_result.get("category") or category,
                 link=link, 
             )
+            finish_claim(link, owner, "done" if ok else "failed")
+            saved += 1 if ok else 0
         except Exception as e:
             print(f"❌ Hata oluştu ({title}):", e)
+            if link:
+                finish_claim(link, owner, "failed")
             continue
+    return {"locked": False, "saved": saved}
 
 
 @app.route("/cron")
 def run_cron():
     category = request.args.get("category", "all")
-    fetch_and_process(category)
-    return jsonify({"status": "ok", "category": category})
+    result = fetch_and_process(category)
+    return jsonify({"status": "ok", "category": category, **result})
+
+if PROFILE_TOKEN:
+    app.before_request(_profile_before)
+    app.after_request(_profile_after)
+    app.teardown_request(_profile_teardown)
+    app.add_url_rule("/debug/profiles/<profile_id>", view_func=get_profile)
+    app.add_url_rule("/debug/slow", view_func=get_slow_requests)
+
+# =================================================
+# Açılış: ön yükleme ve import süreleri
+# =================================================
+# PRELOAD=1 → tembel modüller açılışta yüklenir. gunicorn.conf.py aynı
+# değişkenle preload_app'i açar: import master'da bir kez yapılır, worker'lar
+# fork sonrası modülleri copy-on-write paylaşır. (Master'da thread ya da
+# bağlantı açılmaz; cache ve parse havuzu pid değişince yeniden kurulur.)
+PRELOAD = os.environ.get("PRELOAD", "0") == "1"
+
+
+def warmup():
+    """Ağır modülleri ve dateparser'ın Türkçe dil verisini önceden yükler."""
+    t0 = time.perf_counter()
+    for module in _LAZY_MODULES:
+        module._load()
+    parse_tr_date("3 saat önce")
+    elapsed = time.perf_counter() - t0
+    detail = ", ".join(f"{name} {sec * 1000:.0f} ms" for name, sec in sorted(IMPORT_TIMES.items(), key=lambda kv: -kv[1]))
+    print(f"🔥 Ön yükleme {elapsed * 1000:.0f} ms ({detail})")
+
+
+if not IN_POOL_CHILD:
+    print(f"⏱️ server.py {(time.perf_counter() - _BOOT_STARTED) * 1000:.0f} ms'de yüklendi (pid {os.getpid()})")
+    if PRELOAD:
+        warmup()
 
 # =================================================
 # Main
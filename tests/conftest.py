@@ -0,0 +1,16 @@
+# ================================================
+# tests/conftest.py - server.py'yi ağsız / yan etkisiz import etmek için ortam
+# ================================================
+#   python -m pytest -q
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ["POLL_SCHEDULER"] = "0"
+# Önceki koşunun feed anlık görüntüsü testlere sızmasın
+os.environ["SNAPSHOT_PATH"] = ""
@@ -0,0 +1,31 @@
+# ================================================
+# tests/test_desc.py - Açıklama tarayıcısı ↔ BeautifulSoup.get_text() eşliği
+# ================================================
+import feedparser
+import pytest
+from bs4 import BeautifulSoup
+
+import server
+from bench.fixtures import DESC_EDGE_CASES, synth_feed
+
+
+@pytest.mark.parametrize("html", DESC_EDGE_CASES)
+def test_edge_cases_match_bs4(html):
+    assert server.html_to_text_and_image(html)[0] == BeautifulSoup(html, "html.parser").get_text()
+
+
+@pytest.mark.parametrize("source", ["milliyet", "mynet", "sabah", "ntv", "trthaber"])
+def test_synthetic_feeds_match_bs4(source):
+    for entry in feedparser.parse(synth_feed(source, "gundem")).entries:
+        raw = entry.get("description") or entry.get("summary", "")
+        soup = BeautifulSoup(raw, "html.parser")
+        img = soup.find("img")
+        text, src = server.html_to_text_and_image(raw)
+        assert text == soup.get_text()
+        assert src == (img.get("src") if img else None)
+
+
+def test_first_img_and_skipped_tags():
+    html = '<script>x</script><p>a<img src="1.jpg"></p><img src="2.jpg"><style>p{}</style>'
+    assert server.html_to_text_and_image(html) == ("a", "1.jpg")
+    assert server.html_to_text_and_image("") == ("", None)
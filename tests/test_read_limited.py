@@ -0,0 +1,62 @@
+# ================================================
+# tests/test_read_limited.py - Akışla okunan gövdede bayt sınırı ve `until`
+# ================================================
+import time
+
+import pytest
+
+import server
+
+
+class FakeResponse:
+    def __init__(self, data, chunk):
+        self.chunks = [data[i : i + chunk] for i in range(0, len(data), chunk)]
+        self.closed = False
+
+    def iter_content(self, size):
+        yield from self.chunks
+
+    def close(self):
+        self.closed = True
+
+
+def _read(data, chunk, max_bytes=10**6, until=None):
+    resp = FakeResponse(data, chunk)
+    body, truncated = server._read_limited(resp, max_bytes, until, time.monotonic() + 5)
+    return body, truncated, resp.closed
+
+
+PAGE = b"<html><HEAD><meta property='og:image' content='x.jpg'></Head><body>" + b"z" * 200 + b"</body></html>"
+
+
+@pytest.mark.parametrize("until", [b"</head>", b"<body", b">"])
+def test_until_across_every_chunk_boundary(until):
+    # Eşleşme hangi parça sınırına denk gelirse gelsin sonuç aynı olmalı
+    expected = PAGE[: PAGE.lower().find(until) + len(until)]
+    for chunk in range(1, len(PAGE) + 1):
+        body, truncated, closed = _read(PAGE, chunk, until=until)
+        assert body == expected, chunk
+        assert not truncated
+        assert closed
+
+
+def test_until_missing_reads_everything():
+    body, truncated, closed = _read(PAGE, 7, until=b"</nope>")
+    assert body == PAGE
+    assert not truncated
+    assert not closed
+
+
+@pytest.mark.parametrize("chunk", [1, 10, 64, 1000])
+def test_max_bytes_truncates(chunk):
+    body, truncated, closed = _read(PAGE, chunk, max_bytes=50)
+    assert body == PAGE[:50]
+    assert truncated
+    assert closed
+
+
+def test_max_bytes_exact_size_is_truncated_flag():
+    # Sınıra tam denk gelen gövde de "sınıra takıldı" sayılır (devamı olabilir)
+    body, truncated, _ = _read(PAGE, 16, max_bytes=len(PAGE))
+    assert body == PAGE
+    assert truncated
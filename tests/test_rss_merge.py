@@ -0,0 +1,25 @@
+# ================================================
+# tests/test_rss_merge.py - Kaynak listelerinin tarihe göre birleştirilmesi
+# ================================================
+import server
+
+
+def _items(source, stamps):
+    return [{"title": f"{source}-{i}", "link": f"https://{source}/{i}", "published_at_ms": ms} for i, ms in enumerate(stamps)]
+
+
+def test_merge_is_independent_of_completion_order():
+    # Dakika hassasiyetli pubDate → farklı kaynaklarda eşit zaman damgaları
+    sources = {"ntv": {}, "sabah": {}, "mynet": {}}
+    lists = {"ntv": _items("ntv", [300, 200, 100]), "sabah": _items("sabah", [300, 200]), "mynet": _items("mynet", [200])}
+    expected = ["ntv-0", "sabah-0", "ntv-1", "sabah-1", "mynet-0", "ntv-2"]
+    for completed in (["ntv", "sabah", "mynet"], ["mynet", "sabah", "ntv"], ["sabah", "mynet", "ntv"]):
+        per_source = {source: lists[source] for source in completed}
+        assert [it["title"] for it in server.merge_source_items(per_source, sources)] == expected
+
+
+def test_merge_dedupes_and_skips_missing_sources():
+    sources = {"ntv": {}, "sabah": {}, "yok": {}}
+    dup = {"title": "aynı", "link": "https://x/1", "published_at_ms": 50}
+    per_source = {"sabah": [dict(dup)], "ntv": [dict(dup)]}
+    assert len(server.merge_source_items(per_source, sources)) == 1
@@ -0,0 +1,67 @@
+# ================================================
+# tests/test_search.py - Türkçe terim normalizasyonu ve arama cursor'ı
+# ================================================
+import base64
+
+import pytest
+
+import server
+
+
+@pytest.mark.parametrize(
+    "words, term",
+    [
+        (["İstanbul'da", "İSTANBUL", "istanbul", "İstanbul’dan"], "istanbul"),
+        (["IŞIK", "ışık"], "isik"),
+        (["ekonomide", "ekonomisinde", "ekonomi"], "ekonomi"),
+        (["öğrencilerin", "öğrenciler", "öğrenci"], "ogrenci"),
+        (["şampiyonluğu", "şampiyonluk"], "sampiyonluk"),
+        (["seçimlerinde", "seçim"], "secim"),
+    ],
+)
+def test_tr_normalize_same_stem(words, term):
+    assert {server.tr_normalize(w) for w in words} == {term}
+
+
+def test_tr_normalize_keeps_short_stems():
+    # Kök _TR_MIN_STEM'den kısa kalacaksa ek budanmaz
+    assert server.tr_normalize("golde") == "golde"
+    assert server.tr_normalize("gol") == "gol"
+
+
+def test_tr_terms_tokenizes():
+    assert server.tr_terms("İstanbul'da deprem: 5,2 büyüklüğünde!") == ["istanbul", "deprem", "5", "2", "buyukluk"]
+    assert server.tr_terms(None) == []
+
+
+@pytest.mark.parametrize("score, news_id", [(-3.25, 42), (0.0, 1), (-1e-9, 2**40)])
+def test_cursor_round_trip(score, news_id):
+    token = server._encode_cursor(score, news_id)
+    assert "=" not in token
+    assert server._decode_cursor(token) == (score, news_id)
+
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["!!!", "a", _b64(b"{}"), _b64(b"[1]"), _b64(b'["a", 1]'), _b64(b"[1, null]"), _b64(b"5"), _b64(b"\xff\xfe")],
+)
+def test_bad_cursor_is_400(cursor):
+    # Cursor DB'ye gitmeden çözülür → hatalı cursor 400, 500 değil
+    resp = server.app.test_client().get("/news/search", query_string={"q": "deprem", "cursor": cursor})
+    assert resp.status_code == 400
+    assert resp.get_json()["success"] is False
+
+
+def test_candidate_cap_applies_within_category(tmp_path, monkeypatch):
+    # 100 "deprem" eşleşmesinin sadece en eski 5'i spor → sınır kategori içinde uygulanmalı
+    monkeypatch.setattr(server, "SEARCH_MAX_CANDIDATES", 10)
+    index = server.SearchIndex(str(tmp_path / "search.sqlite3"))
+    index.add_many(
+        [(i, f"deprem haberi {i}", "deprem", "spor" if i <= 5 else "gundem", "2025-01-01") for i in range(1, 101)]
+    )
+    assert sorted(news_id for news_id, _ in index.search(["deprem"], "spor", 20)) == [1, 2, 3, 4, 5]
+    assert len(index.search(["deprem"], None, 20)) == 10